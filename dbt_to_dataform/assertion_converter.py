@@ -0,0 +1,196 @@
+# assertion_converter.py
+
+import re
+from pathlib import Path
+
+from dbt_to_dataform.conversion_report import ConversionReport
+from dbt_to_dataform.yaml_cache import load_yaml
+
+
+class AssertionConverter:
+    """Converts dbt schema tests into Dataform assertions.
+
+    All column-level tests of a model (plus the model-level tests that only
+    need the model's own rows) are combined into a single assertion, so the
+    table is scanned once rather than once per test. Each test becomes a
+    failing-row count, and the assertion returns one row per failing test, so
+    the failing test is still named in the output.
+    """
+
+    def __init__(self, dataform_output_path: Path):
+        self.dataform_output_path = Path(dataform_output_path)
+
+    def convert_schema_tests(self, schema_path: Path, conversion_report: ConversionReport = None) -> list:
+        dbt_schema = load_yaml(schema_path)
+
+        models = dbt_schema.get('models') if isinstance(dbt_schema, dict) else None
+        if not isinstance(models, list):
+            return []
+
+        assertions_dir = self.dataform_output_path / 'definitions' / 'assertions'
+        assertions_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        for model in models:
+            model_name = model['name']
+            checks = []
+            relationship_assertions = []
+
+            for test in self._get_tests(model):
+                self._add_model_check(model_name, test, checks, schema_path, conversion_report)
+
+            for column in model.get('columns', []) or []:
+                column_name = column['name']
+                for test in self._get_tests(column):
+                    test_name, params = self._split_test(test)
+                    if test_name == 'relationships':
+                        relationship_assertions.append(self._relationships_assertion(model_name, column_name, params))
+                        continue
+                    condition = self._column_check(column_name, test_name, params)
+                    if condition is None:
+                        self._report_unconverted(schema_path, model_name, f"{test_name} on {column_name}", conversion_report)
+                        continue
+                    checks.append((f"{test_name}__{column_name}", condition))
+
+            if checks:
+                output_file = assertions_dir / f"{model_name}_tests.sqlx"
+                output_file.write_text(self._combined_assertion(model_name, checks))
+                written.append(output_file)
+                print(f"Combined {len(checks)} tests for {model_name} into {output_file.name}")
+
+            for name, content in relationship_assertions:
+                output_file = assertions_dir / f"{name}.sqlx"
+                output_file.write_text(content)
+                written.append(output_file)
+
+        return written
+
+    def _get_tests(self, node: dict) -> list:
+        return (node.get('tests') or []) + (node.get('data_tests') or [])
+
+    def _split_test(self, test):
+        if isinstance(test, str):
+            return self._short_name(test), {}
+        test_name = list(test.keys())[0]
+        params = test[test_name] if isinstance(test[test_name], dict) else {}
+        # dbt 1.10+ nests test parameters under `arguments`
+        params = {**{k: v for k, v in params.items() if k != 'arguments'}, **(params.get('arguments') or {})}
+        return self._short_name(test_name), params
+
+    def _short_name(self, test_name: str) -> str:
+        return test_name.split('.')[-1]
+
+    def _where(self, params: dict):
+        return (params.get('config') or {}).get('where') or params.get('where')
+
+    def _count_failures(self, failure_condition: str, params: dict) -> str:
+        where = self._where(params)
+        if where:
+            return f"COUNTIF(({where}) AND ({failure_condition}))"
+        return f"COUNTIF({failure_condition})"
+
+    def _literal(self, value, quote: bool = True) -> str:
+        if quote and isinstance(value, str):
+            return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+        return str(value)
+
+    def _column_check(self, column: str, test_name: str, params: dict):
+        """Return a SQL expression counting the rows failing the test, or None if unsupported."""
+        if test_name == 'not_null':
+            return self._count_failures(f"{column} IS NULL", params)
+        if test_name == 'unique':
+            where = self._where(params)
+            value = f"IF({where}, {column}, NULL)" if where else column
+            return f"COUNT({value}) - COUNT(DISTINCT {value})"
+        if test_name == 'accepted_values' and params.get('values'):
+            quote = params.get('quote', True)
+            values = ", ".join(self._literal(v, quote) for v in params['values'])
+            return self._count_failures(f"{column} IS NOT NULL AND {column} NOT IN ({values})", params)
+        if test_name == 'accepted_range':
+            inclusive = params.get('inclusive', True)
+            bounds = []
+            if params.get('min_value') is not None:
+                bounds.append(f"{column} {'<' if inclusive else '<='} {params['min_value']}")
+            if params.get('max_value') is not None:
+                bounds.append(f"{column} {'>' if inclusive else '>='} {params['max_value']}")
+            if bounds:
+                return self._count_failures(" OR ".join(bounds), params)
+        if test_name == 'expression_is_true' and params.get('expression'):
+            return self._count_failures(f"NOT ({column} {params['expression']})", params)
+        if test_name == 'not_empty_string':
+            return self._count_failures(f"TRIM({column}) = ''", params)
+        return None
+
+    def _add_model_check(self, model_name: str, test, checks: list, schema_path: Path, conversion_report: ConversionReport):
+        test_name, params = self._split_test(test)
+        if test_name == 'unique_combination_of_columns' and params.get('combination_of_columns'):
+            columns = params['combination_of_columns']
+            key = f"TO_JSON_STRING(STRUCT({', '.join(columns)}))"
+            where = self._where(params)
+            value = f"IF({where}, {key}, NULL)" if where else key
+            checks.append((f"{test_name}__{'_'.join(columns)}", f"COUNT({value}) - COUNT(DISTINCT {value})"))
+        elif test_name == 'expression_is_true' and params.get('expression'):
+            checks.append((f"{test_name}__{len(checks) + 1}", self._count_failures(f"NOT ({params['expression']})", params)))
+        else:
+            self._report_unconverted(schema_path, model_name, test_name, conversion_report)
+
+    def _report_unconverted(self, schema_path: Path, model_name: str, test_description: str, conversion_report: ConversionReport):
+        print(f"Unsupported test {test_description} on {model_name}")
+        if conversion_report:
+            conversion_report.add_issue(
+                str(schema_path),
+                "Unconverted Test",
+                f"The test {test_description} on model {model_name} could not be converted to a Dataform assertion."
+            )
+
+    def _combined_assertion(self, model_name: str, checks: list) -> str:
+        labels = []
+        select_items = []
+        for label, condition in checks:
+            label = re.sub(r'\W', '_', label)
+            # Keep labels unique when the same test appears twice
+            unique_label = label
+            suffix = 2
+            while unique_label in labels:
+                unique_label = f"{label}_{suffix}"
+                suffix += 1
+            labels.append(unique_label)
+            select_items.append(f"    {condition} AS {unique_label}")
+
+        return (
+            "config {\n"
+            "  type: \"assertion\",\n"
+            f"  name: \"{model_name}_tests\",\n"
+            "  tags: [\"dbt_test\"]\n"
+            "}\n\n"
+            "-- Each row names a failing test and the number of rows that failed it\n"
+            "SELECT test_name, failing_rows\n"
+            "FROM (\n"
+            "  SELECT\n" + ",\n".join(select_items) + "\n"
+            f"  FROM ${{ref('{model_name}')}}\n"
+            ")\n"
+            f"UNPIVOT (failing_rows FOR test_name IN ({', '.join(labels)}))\n"
+            "WHERE failing_rows > 0\n"
+        )
+
+    def _relationships_assertion(self, model_name: str, column: str, params: dict) -> tuple:
+        # Relationships need a second table, so they get their own assertion
+        to_match = re.search(r'ref\([\'"](\w+)[\'"]\)', str(params.get('to', '')))
+        source_match = re.search(r'source\([\'"]\w+[\'"]\s*,\s*[\'"](\w+)[\'"]\)', str(params.get('to', '')))
+        parent = to_match.group(1) if to_match else source_match.group(1) if source_match else params.get('to')
+        field = params.get('field', column)
+        where = self._where(params)
+        name = f"{model_name}_relationships__{column}"
+        content = (
+            "config {\n"
+            "  type: \"assertion\",\n"
+            f"  name: \"{name}\",\n"
+            "  tags: [\"dbt_test\"]\n"
+            "}\n\n"
+            f"SELECT 'relationships__{column}' AS test_name, child.{column}\n"
+            f"FROM ${{ref('{model_name}')}} AS child\n"
+            f"LEFT JOIN ${{ref('{parent}')}} AS parent ON child.{column} = parent.{field}\n"
+            f"WHERE child.{column} IS NOT NULL AND parent.{field} IS NULL"
+            + (f" AND ({where})" if where else "") + "\n"
+        )
+        return name, content
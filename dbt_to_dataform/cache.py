@@ -0,0 +1,18 @@
+# cache.py
+
+import os
+from pathlib import Path
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """Return (and create) a directory in the user-level converter cache.
+
+    Defaults to ~/.cache/dbt_to_dataform, overridable with DBT_TO_DATAFORM_CACHE_DIR.
+    """
+    base = os.environ.get('DBT_TO_DATAFORM_CACHE_DIR')
+    if not base:
+        xdg_cache = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+        base = os.path.join(xdg_cache, 'dbt_to_dataform')
+    path = Path(base, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
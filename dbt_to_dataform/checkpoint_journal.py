@@ -0,0 +1,99 @@
+# checkpoint_journal.py
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Union
+
+
+def content_fingerprint(*parts: Union[Path, str]) -> str:
+    """Hash a unit's inputs: the contents of files (given as Paths) and strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(Path(part).read_bytes() if isinstance(part, Path) else part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class CheckpointJournal:
+    """Append-only journal of the units of a conversion that have completed.
+
+    A unit (the sources, a macro file, a model, a schema.yml, ...) is recorded
+    once its output is on disk, together with the report issues it raised and
+    any result later units need and a fingerprint of the unit's inputs. Each
+    entry is flushed and fsynced, so after a crash or Ctrl-C a resumed run
+    skips everything journaled whose inputs are unchanged, restores its issues,
+    and only repeats (and repays for) the units that were in flight or edited.
+    A disabled journal (e.g. for --plan) neither reads nor writes the file.
+    """
+
+    FILE_NAME = '.conversion_journal.jsonl'
+
+    def __init__(self, output_path: Path, resume: bool = False, enabled: bool = True):
+        self.path = Path(output_path) / self.FILE_NAME
+        self.enabled = enabled
+        self.entries = {}
+        # Units skipped because an earlier run completed them
+        self.reused = set()
+        self._lock = threading.Lock()
+
+        if not enabled:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._load()
+            print(f"Resuming conversion: {len(self.entries)} units already completed")
+        else:
+            # A fresh run must not pick up a previous run's progress
+            self.path.write_text('')
+
+    def _load(self):
+        content = self.path.read_text()
+        if content and not content.endswith('\n'):
+            # The run died mid-write: drop the partial entry so that unit is redone
+            content = content[:content.rfind('\n') + 1]
+            self.path.write_text(content)
+        for line in content.splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.entries[entry['unit']] = entry
+
+    def is_done(self, unit: str, fingerprint: str = None) -> bool:
+        """Whether the unit was completed from the same inputs; if so it counts as reused."""
+        with self._lock:
+            entry = self.entries.get(unit)
+            if entry is None or entry.get('fingerprint') != fingerprint:
+                return False
+            self.reused.add(unit)
+            return True
+
+    def result(self, unit: str):
+        return self.entries[unit].get('result')
+
+    def issues(self) -> List[dict]:
+        """Return the report issues of every reused unit, in journal order."""
+        return [issue for unit, entry in self.entries.items() if unit in self.reused for issue in entry['issues']]
+
+    def completed_fingerprint(self, prefixes: Iterable[str]) -> str:
+        """Fingerprint the completed units whose names start with one of prefixes,
+        for steps that post-process those units' outputs."""
+        prefixes = tuple(prefixes)
+        with self._lock:
+            return content_fingerprint(*(f"{unit} {entry.get('fingerprint')}"
+                                         for unit, entry in sorted(self.entries.items()) if unit.startswith(prefixes)))
+
+    def record(self, unit: str, issues: List[dict] = (), result=None, fingerprint: str = None):
+        entry = {"unit": unit, "issues": list(issues), "result": result, "fingerprint": fingerprint}
+        with self._lock:
+            self.reused.discard(unit)
+            if not self.enabled:
+                return
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[unit] = entry
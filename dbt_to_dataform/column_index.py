@@ -0,0 +1,100 @@
+# column_index.py
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dbt_to_dataform.yaml_cache import load_yaml
+
+
+class ColumnIndex:
+    """Index of known column names per model, seed, snapshot and source table.
+
+    Columns come from schema.yml `columns` entries, and from dbt's
+    target/manifest.json and target/catalog.json when they exist. The catalog
+    reflects the warehouse, so it takes precedence, then the manifest, then YAML.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, List[str]] = {}
+        self._priority: Dict[str, int] = {}
+
+    def add(self, name: str, columns: List[str], priority: int = 0):
+        if not name or not columns:
+            return
+        if priority >= self._priority.get(name, -1):
+            self.columns[name] = list(columns)
+            self._priority[name] = priority
+
+    def get(self, name: str) -> Optional[List[str]]:
+        return self.columns.get(name)
+
+    def is_resolved(self, name: str) -> bool:
+        """Whether a relation's columns come from the catalog, i.e. the warehouse.
+
+        YAML, and the manifest built from it, only list documented columns,
+        which may be a subset of the table.
+        """
+        return self._priority.get(name, -1) >= 2
+
+    @classmethod
+    def build(cls, dbt_project_path: Path) -> 'ColumnIndex':
+        index = cls()
+        dbt_project_path = Path(dbt_project_path)
+        for yaml_path in dbt_project_path.rglob('*.yml'):
+            if 'dbt_packages' in yaml_path.parts or 'target' in yaml_path.parts:
+                continue
+            index._add_schema_yml(yaml_path)
+        index._add_manifest(dbt_project_path / 'target' / 'manifest.json')
+        index._add_catalog(dbt_project_path / 'target' / 'catalog.json')
+        return index
+
+    def _add_schema_yml(self, yaml_path: Path):
+        try:
+            content = load_yaml(yaml_path)
+        except Exception as e:
+            print(f"Error reading columns from {yaml_path}: {str(e)}")
+            return
+        if not isinstance(content, dict):
+            return
+
+        for key in ('models', 'seeds', 'snapshots'):
+            nodes = content.get(key)
+            if isinstance(nodes, list):
+                for node in nodes:
+                    self._add_node(node)
+        for source in content.get('sources', []) or []:
+            for table in source.get('tables', []) or []:
+                self._add_node(table)
+
+    def _add_node(self, node):
+        if isinstance(node, dict) and isinstance(node.get('columns'), list):
+            columns = [c['name'] for c in node['columns'] if isinstance(c, dict) and c.get('name')]
+            self.add(node.get('name'), columns, priority=0)
+
+    def _add_manifest(self, manifest_path: Path):
+        for node in self._load_nodes(manifest_path):
+            columns = list((node.get('columns') or {}).keys())
+            self.add(node.get('name'), columns, priority=1)
+
+    def _add_catalog(self, catalog_path: Path):
+        for node in self._load_nodes(catalog_path):
+            columns = node.get('columns') or {}
+            # Catalog columns carry their ordinal position in the warehouse
+            ordered = sorted(columns.values(), key=lambda c: c.get('index', 0))
+            # The unique_id ends in the model or source table name; metadata.name is the relation alias
+            name = node.get('unique_id', '').split('.')[-1] or (node.get('metadata') or {}).get('name')
+            self.add(name, [c['name'] for c in ordered], priority=2)
+
+    def _load_nodes(self, path: Path) -> list:
+        if not path.exists():
+            return []
+        try:
+            with open(path, 'r') as f:
+                artifact = json.load(f)
+        except Exception as e:
+            print(f"Error reading {path}: {str(e)}")
+            return []
+        nodes = list((artifact.get('nodes') or {}).values())
+        nodes.extend((artifact.get('sources') or {}).values())
+        return nodes
@@ -0,0 +1,147 @@
+# conversion_planner.py
+
+import json
+import threading
+from pathlib import Path
+
+from dbt_to_dataform.llm_cache import LLMResponseCache
+from dbt_to_dataform.macro_converter import MacroConverter
+from dbt_to_dataform.package_cache import PackageCache
+from dbt_to_dataform.syntax_checker import SyntaxChecker
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a characters-per-token estimate
+    tiktoken = None
+
+
+class ConversionPlanner:
+    """Estimates the OpenAI requests, tokens, cost and wall time of a conversion.
+
+    The conversion itself runs offline; every request MacroConverter and
+    SyntaxChecker would send is built and measured instead of sent. Prompts
+    already in the LLM response cache are counted as free and instant.
+    """
+
+    # USD per 1K (prompt, response) tokens
+    PRICES = {
+        "gpt-4": (0.03, 0.06),
+        "gpt-3.5-turbo": (0.0005, 0.0015),
+    }
+    # Generated tokens per second, plus a fixed overhead per request in seconds
+    RESPONSE_TOKENS_PER_SECOND = {
+        "gpt-4": 20,
+        "gpt-3.5-turbo": 60,
+    }
+    REQUEST_OVERHEAD_SECONDS = 1.0
+    # Converted JavaScript tends to be longer than the Jinja macro it replaces
+    MACRO_RESPONSE_RATIO = 1.5
+    # The explanation of changes that accompanies a corrected file
+    SYNTAX_EXPLANATION_TOKENS = 150
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, llm_cache: LLMResponseCache = None, concurrency: int = 4, rate_limit: float = None,
+                 syntax_fragments: bool = False):
+        self.llm_cache = llm_cache
+        self.concurrency = max(1, concurrency)
+        self.rate_limit = rate_limit
+        self.syntax_checker = SyntaxChecker(None, llm_cache, fragment_mode=syntax_fragments)
+        self.requests = []
+        self._encodings = {}
+        self._lock = threading.Lock()
+
+    def count_tokens(self, text: str, model: str) -> int:
+        if tiktoken is None:
+            return (len(text) + self.CHARS_PER_TOKEN - 1) // self.CHARS_PER_TOKEN
+        if model not in self._encodings:
+            self._encodings[model] = tiktoken.encoding_for_model(model)
+        return len(self._encodings[model].encode(text, disallowed_special=()))
+
+    def plan_macros(self, macro_converter: MacroConverter, dbt_project_path: Path, package_cache: PackageCache):
+        for kind, macro_file, prompt, source in macro_converter.plan_requests(dbt_project_path, package_cache):
+            model = macro_converter.MODEL_NAME
+            response_tokens = int(self.count_tokens(source, model) * self.MACRO_RESPONSE_RATIO)
+            self._add(kind, macro_file, model, prompt, response_tokens)
+
+    def plan_syntax_check(self, file_path: Path, content: str):
+        request = self.syntax_checker.plan_request(file_path, content)
+        if request is None:
+            return
+        prompt, echoed = request
+        model = self.syntax_checker.MODEL_NAME
+        # The corrected code is sent back in full, along with an explanation
+        response_tokens = self.count_tokens(echoed, model) + self.SYNTAX_EXPLANATION_TOKENS
+        self._add('syntax', file_path, model, prompt, response_tokens,
+                  system_prompt=self.syntax_checker.SYSTEM_PROMPT)
+
+    def _add(self, kind: str, file_path: Path, model: str, prompt: str, response_tokens: int,
+             system_prompt: str = ''):
+        cached = bool(self.llm_cache and self.llm_cache.contains(model, prompt))
+        prompt_tokens = self.count_tokens(system_prompt + prompt, model)
+        prompt_price, response_price = self.PRICES.get(model, (0, 0))
+        request = {
+            "kind": kind,
+            "file": str(file_path),
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "cached": cached,
+            "cost": 0.0 if cached else prompt_tokens / 1000 * prompt_price + response_tokens / 1000 * response_price,
+            "seconds": 0.0 if cached else
+                self.REQUEST_OVERHEAD_SECONDS + response_tokens / self.RESPONSE_TOKENS_PER_SECOND.get(model, 20),
+        }
+        with self._lock:
+            self.requests.append(request)
+
+    def projected_seconds(self) -> float:
+        """Packages convert one request at a time before the models; project macros convert one
+        at a time alongside the syntax checks, which run `concurrency` at a time."""
+        def total(kind):
+            return sum(r["seconds"] for r in self.requests if r["kind"] == kind)
+
+        seconds = total('package') + max(total('macro'), total('syntax') / self.concurrency)
+        if self.rate_limit:
+            sent = sum(1 for r in self.requests if not r["cached"])
+            seconds = max(seconds, sent / self.rate_limit * 60)
+        return seconds
+
+    def summary(self) -> dict:
+        sent = [r for r in self.requests if not r["cached"]]
+        return {
+            "requests": len(self.requests),
+            "cached_requests": len(self.requests) - len(sent),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in sent),
+            "response_tokens": sum(r["response_tokens"] for r in sent),
+            "cached_prompt_tokens": sum(r["prompt_tokens"] for r in self.requests if r["cached"]),
+            "projected_cost": round(sum(r["cost"] for r in sent), 4),
+            "projected_seconds": round(self.projected_seconds(), 1),
+            "concurrency": self.concurrency,
+            "rate_limit_per_minute": self.rate_limit,
+        }
+
+    def generate_report(self, output_path: Path) -> dict:
+        """Print the plan and write it to conversion_plan.json in output_path."""
+        output_path = Path(output_path)
+        output_path.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        requests = sorted(self.requests, key=lambda r: (r["kind"], r["file"]))
+
+        print("\nConversion Plan (no OpenAI requests were made)")
+        print("==============================================")
+        for r in requests:
+            status = "cached" if r["cached"] else f"${r['cost']:.4f}"
+            print(f"{r['kind']:<8} {r['file']}: {r['prompt_tokens']} prompt + {r['response_tokens']} response tokens ({status})")
+
+        minutes, seconds = divmod(int(round(summary["projected_seconds"])), 60)
+        rate_limit = f", {self.rate_limit:g} requests/minute" if self.rate_limit else ""
+        print(f"\nRequests: {summary['requests']} ({summary['cached_requests']} cached)")
+        print(f"Prompt tokens: {summary['prompt_tokens']} ({summary['cached_prompt_tokens']} more served from cache)")
+        print(f"Response tokens: {summary['response_tokens']}")
+        print(f"Projected cost: ${summary['projected_cost']:.2f}")
+        print(f"Projected wall time: {minutes}m {seconds}s at concurrency {self.concurrency}{rate_limit}")
+
+        plan_file = output_path / "conversion_plan.json"
+        with open(plan_file, "w") as f:
+            json.dump({**summary, "files": requests}, f, indent=2)
+        print(f"Conversion plan written: {plan_file}")
+        return summary
@@ -15,6 +15,15 @@ class ConversionReport:
             "description": description
         })
 
+    def add_issues(self, issues: list):
+        """Add already recorded issues, e.g. those of one converted file or a resumed run."""
+        self.issues.extend(issues)
+
+    def add_report(self, project_name: str, report: 'ConversionReport'):
+        """Add the issues of a project's report to this combined report."""
+        for issue in report.issues:
+            self.issues.append({"project": project_name, **issue})
+
     def generate_report(self):
         report = {
             "total_issues": len(self.issues),
@@ -37,7 +46,10 @@ class ConversionReport:
             if self.issues:
                 f.write("Issues that need attention:\n")
                 for issue in self.issues:
-                    f.write(f"\nFile: {issue['file']}\n")
+                    f.write("\n")
+                    if 'project' in issue:
+                        f.write(f"Project: {issue['project']}\n")
+                    f.write(f"File: {issue['file']}\n")
                     f.write(f"Type: {issue['type']}\n")
                     f.write(f"Description: {issue['description']}\n")
             else:
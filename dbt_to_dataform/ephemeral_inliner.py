@@ -0,0 +1,276 @@
+# ephemeral_inliner.py
+
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from dbt_to_dataform.checkpoint_journal import content_fingerprint
+from dbt_to_dataform.conversion_report import ConversionReport
+
+
+class EphemeralInliner:
+    """Inlines converted ephemeral models into the actions that reference them.
+
+    Dataform has no ephemeral type, so, as dbt does, every ephemeral model a
+    file depends on (directly or through other ephemerals) is added to that
+    file's query as a `__dbt__cte__<model>` CTE, and its refs point at the CTE.
+    The ephemeral files are then removed. A query that is a
+    `${when(incremental(), ...)}` template gets the CTEs in both branches.
+    Ephemerals with more than max_consumers consumers or more than max_lines
+    lines, or used by a query that can't take a CTE, are materialized as views
+    instead.
+
+    Every file is saved as converted before it is rewritten or removed, so a
+    resumed run can restore the files it didn't convert again and inline the
+    whole project afresh, instead of working from already inlined files.
+    """
+
+    ORIGINALS_DIR = '.ephemeral_originals'
+    # relative path -> fingerprint of the content written, or None if removed
+    MANIFEST_FILE = 'inlined.json'
+
+    CTE_PREFIX = '__dbt__cte__'
+    BLOCK_PATTERN = re.compile(r'\s*(?:config|pre_operations|post_operations|js)\s*\{')
+    EPHEMERAL_TYPE_PATTERN = re.compile(r'(\btype\s*:\s*)["\']ephemeral["\']')
+    REF_PATTERN = re.compile(r'\$\{\s*ref\(\s*[\'"](\w+)[\'"]\s*\)\s*\}')
+    # Rendered incremental models: ${when(incremental(), `<incremental>`, `<full refresh>`)}
+    WHEN_PATTERN = re.compile(r'\$\{\s*when\(\s*incremental\(\)\s*,\s*`')
+
+    def __init__(self, dataform_output_path: Path, max_consumers: Optional[int] = None,
+                 max_lines: Optional[int] = None):
+        self.definitions_dir = Path(dataform_output_path) / 'definitions'
+        self.originals_dir = Path(dataform_output_path) / self.ORIGINALS_DIR
+        self.max_consumers = max_consumers
+        self.max_lines = max_lines
+        # Ephemerals kept as views by inline_ephemerals
+        self.materialized_files: List[Path] = []
+
+    def inline_ephemerals(self, conversion_report: ConversionReport = None) -> int:
+        """Inline every ephemeral model, returning the number of ephemerals inlined."""
+        self._restore_originals()
+        self._manifest = {}
+        files = {}
+        for path in sorted(self.definitions_dir.rglob('*.sqlx')):
+            header, body = self._split_sqlx(path.read_text())
+            files[path] = (header, body)
+
+        ephemerals = {path.stem: path for path, (header, _) in files.items()
+                      if self.EPHEMERAL_TYPE_PATTERN.search(header)}
+        if not ephemerals:
+            return 0
+
+        refs = {path: set(self.REF_PATTERN.findall(body)) & set(ephemerals) for path, (_, body) in files.items()}
+        consumers = {name: [path for path in files if name in refs[path] and path.stem != name] for name in ephemerals}
+
+        inlined = set()
+        for name, path in ephemerals.items():
+            reason = self._materialize_reason(files[path][1], consumers[name])
+            if reason:
+                self._materialize(path, files, reason, conversion_report)
+            else:
+                inlined.add(name)
+
+        # Queries that can't take a CTE (e.g. a single when() template) keep their
+        # ephemerals as views; those views then become consumers themselves
+        changed = True
+        while changed:
+            changed = False
+            for path, (_, body) in files.items():
+                if path.stem in inlined or not refs[path] & inlined or self._can_inject(body):
+                    continue
+                for name in sorted(refs[path] & inlined):
+                    inlined.discard(name)
+                    reason = f"{path.name} does not start with a SELECT or WITH, so a CTE can't be added to it"
+                    self._materialize(ephemerals[name], files, reason, conversion_report)
+                changed = True
+
+        for path, (header, body) in files.items():
+            if path.stem in inlined:
+                continue
+            needed = self._dependencies(refs[path] & inlined, refs, ephemerals, inlined)
+            if not needed:
+                continue
+            ctes = [f"{self.CTE_PREFIX}{name} AS (\n{self._replace_refs(files[ephemerals[name]][1], inlined).strip().rstrip(';')}\n)"
+                    for name in needed]
+            self._write(path, header + self._inject_ctes(self._replace_refs(body, inlined), ctes))
+            print(f"Inlined {', '.join(needed)} into {path.name}")
+
+        for name in sorted(inlined):
+            self._remove(ephemerals[name])
+            if not consumers[name]:
+                print(f"Removed unused ephemeral model {name}")
+                if conversion_report:
+                    conversion_report.add_issue(
+                        str(ephemerals[name]),
+                        "Unused Ephemeral Model",
+                        f"The ephemeral model {name} is not referenced by any model and was not converted."
+                    )
+        return len(inlined)
+
+    def discard_originals(self):
+        """Forget the files saved by earlier runs, e.g. when a conversion starts over."""
+        shutil.rmtree(self.originals_dir, ignore_errors=True)
+
+    def _restore_originals(self):
+        # Files still as this inliner left them were not converted again, so they get
+        # their converted content back; files converted again since are kept
+        manifest_path = self.originals_dir / self.MANIFEST_FILE
+        if manifest_path.exists():
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            for relative_path, written in manifest.items():
+                path = self.definitions_dir / relative_path
+                original = self.originals_dir / relative_path
+                if not original.exists():
+                    continue
+                if written is None and not path.exists() or \
+                        written is not None and path.exists() and content_fingerprint(path) == written:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy(original, path)
+        self.discard_originals()
+
+    def _save_original(self, path: Path, written: Optional[str]):
+        relative_path = path.relative_to(self.definitions_dir).as_posix()
+        if relative_path not in self._manifest:
+            original = self.originals_dir / relative_path
+            original.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(path, original)
+        self._manifest[relative_path] = written
+        # Saved after every change, so an interrupted run can still be restored
+        with open(self.originals_dir / self.MANIFEST_FILE, 'w') as f:
+            json.dump(self._manifest, f, indent=2)
+
+    def _write(self, path: Path, content: str):
+        self._save_original(path, content_fingerprint(content))
+        path.write_text(content)
+
+    def _remove(self, path: Path):
+        self._save_original(path, None)
+        path.unlink()
+
+    def is_ephemeral(self, content: str) -> bool:
+        return self.EPHEMERAL_TYPE_PATTERN.search(self._split_sqlx(content)[0]) is not None
+
+    def _split_sqlx(self, content: str) -> tuple:
+        """Split a SQLX file into its leading config/operations blocks and its query."""
+        position = 0
+        while True:
+            match = self.BLOCK_PATTERN.match(content, position)
+            if not match:
+                break
+            depth = 1
+            index = match.end()
+            while index < len(content) and depth:
+                if content[index] == '{':
+                    depth += 1
+                elif content[index] == '}':
+                    depth -= 1
+                index += 1
+            position = index
+        return content[:position], content[position:]
+
+    def _materialize_reason(self, body: str, consumers: List[Path]) -> Optional[str]:
+        if self.max_consumers is not None and len(consumers) > self.max_consumers:
+            return f"it is referenced by {len(consumers)} models (more than {self.max_consumers})"
+        if self._when_branches(body):
+            return "its query is a when(incremental(), ...) template, which can't be used as a CTE"
+        lines = body.strip().count('\n') + 1
+        if self.max_lines is not None and lines > self.max_lines:
+            return f"its query has {lines} lines (more than {self.max_lines})"
+        return None
+
+    def _materialize(self, path: Path, files: dict, reason: str, conversion_report: ConversionReport):
+        header, body = files[path]
+        header = self.EPHEMERAL_TYPE_PATTERN.sub(r'\1"view"', header)
+        files[path] = (header, body)
+        self._write(path, header + body)
+        self.materialized_files.append(path)
+        print(f"Materialized ephemeral model {path.stem} as a view: {reason}")
+        if conversion_report:
+            conversion_report.add_issue(
+                str(path),
+                "Ephemeral Materialized",
+                f"The ephemeral model {path.stem} was converted to a view because {reason}."
+            )
+
+    def _dependencies(self, names: Set[str], refs: Dict[Path, Set[str]], ephemerals: Dict[str, Path],
+                      inlined: Set[str]) -> List[str]:
+        # Depth-first, so an ephemeral's own ephemeral dependencies come before it
+        ordered = []
+
+        def visit(name):
+            if name in ordered:
+                return
+            for dependency in sorted(refs[ephemerals[name]] & inlined):
+                visit(dependency)
+            ordered.append(name)
+
+        for name in sorted(names):
+            visit(name)
+        return ordered
+
+    def _replace_refs(self, sql: str, inlined: Set[str]) -> str:
+        return self.REF_PATTERN.sub(
+            lambda m: f"{self.CTE_PREFIX}{m.group(1)}" if m.group(1) in inlined else m.group(0), sql)
+
+    def _query_start(self, body: str) -> int:
+        # Skip leading whitespace and comments
+        match = re.match(r'(?:\s+|--[^\n]*\n?|/\*.*?\*/)*', body, re.DOTALL)
+        return match.end()
+
+    def _when_branches(self, body: str) -> Optional[List[tuple]]:
+        """Return the (start, end) spans of both branches if the query is a single when() template."""
+        match = self.WHEN_PATTERN.match(body, self._query_start(body))
+        if not match:
+            return None
+        first_end = self._literal_end(body, match.end())
+        separator = re.compile(r'\s*,\s*`').match(body, first_end + 1) if first_end is not None else None
+        if not separator:
+            return None
+        second_end = self._literal_end(body, separator.end())
+        if second_end is None or not re.fullmatch(r'\s*\)\s*\}\s*;?\s*', body[second_end + 1:]):
+            return None
+        return [(match.end(), first_end), (separator.end(), second_end)]
+
+    def _literal_end(self, text: str, position: int) -> Optional[int]:
+        # Index of the backtick closing a template literal, skipping escaped characters
+        while position < len(text):
+            if text[position] == '\\':
+                position += 2
+            elif text[position] == '`':
+                return position
+            else:
+                position += 1
+        return None
+
+    def _escape(self, sql: str) -> str:
+        # As JinjaRenderer does for the branches of a when() template
+        return sql.replace('\\', '\\\\').replace('`', '\\`')
+
+    def _is_query(self, body: str) -> bool:
+        return re.match(r'(?:with|select)\b|\(', body[self._query_start(body):], re.IGNORECASE) is not None
+
+    def _can_inject(self, body: str) -> bool:
+        branches = self._when_branches(body)
+        if branches:
+            return all(self._is_query(body[start:end]) for start, end in branches)
+        return self._is_query(body)
+
+    def _inject_ctes(self, body: str, ctes: List[str]) -> str:
+        branches = self._when_branches(body)
+        if branches:
+            ctes = [self._escape(cte) for cte in ctes]
+            for start, end in reversed(branches):
+                body = body[:start] + self._inject_query_ctes(body[start:end], ctes) + body[end:]
+            return body
+        return self._inject_query_ctes(body, ctes)
+
+    def _inject_query_ctes(self, body: str, ctes: List[str]) -> str:
+        start = self._query_start(body)
+        with_match = re.match(r'with\b\s*(?:recursive\b\s*)?', body[start:], re.IGNORECASE)
+        if with_match:
+            insert_at = start + with_match.end()
+            return body[:insert_at] + ",\n".join(ctes) + ",\n" + body[insert_at:]
+        return body[:start] + "WITH " + ",\n".join(ctes) + "\n" + body[start:]
@@ -0,0 +1,225 @@
+# isolated_executor.py
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from multiprocessing.connection import wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Result statuses yielded by IsolatedExecutor.imap_unordered
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_MEMORY = "memory"
+STATUS_CRASHED = "crashed"
+
+# Sent to a worker in place of an item to shut it down
+_STOP = None
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def _get_context():
+    # Never fork the (multi-threaded) converting process directly: a child can
+    # inherit a lock held by another thread and hang. Workers are forked from a
+    # single-threaded forkserver instead, or spawned where that isn't available,
+    # so tasks and their arguments must be picklable.
+    global _context
+    with _context_lock:
+        if _context is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                _context = multiprocessing.get_context('forkserver')
+                # Import the converters once in the fork server rather than in every worker.
+                # __main__ stays preloaded so workers don't import it again either.
+                _context.set_forkserver_preload(['__main__', 'dbt_to_dataform.unit_converter'])
+            else:
+                _context = multiprocessing.get_context('spawn')
+        return _context
+
+
+def _address_space_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _limit_memory(memory_limit_mb):
+    if not memory_limit_mb or resource is None:
+        return
+    # Each task may allocate memory_limit_mb on top of what the worker already holds
+    # (interpreter, imported modules, the unpickled function and its caches)
+    limit = _address_space_bytes() + int(memory_limit_mb) * 1024 * 1024
+    try:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        if hard_limit != resource.RLIM_INFINITY:
+            limit = min(limit, hard_limit)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard_limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _run_worker(func, memory_limit_mb, conn):
+    """Run func on every item received on conn, sending back (status, result)."""
+    while True:
+        try:
+            item = conn.recv()
+        except (EOFError, OSError):
+            break
+        if item is _STOP:
+            break
+
+        _limit_memory(memory_limit_mb)
+        try:
+            result = func(item)
+            conn.send((STATUS_OK, result))
+        except MemoryError:
+            conn.send((STATUS_MEMORY, f"Exceeded memory limit of {memory_limit_mb} MB"))
+            # The heap may be left in a bad state: let the executor start a fresh worker
+            break
+        except Exception as e:
+            conn.send((STATUS_ERROR, f"{str(e)}\n{traceback.format_exc()}"))
+    conn.close()
+
+
+class _Worker:
+    """A long-lived worker process and the item it is working on, if any."""
+
+    def __init__(self, context, func: Callable, memory_limit_mb: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_run_worker, args=(func, memory_limit_mb, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.item = None
+        self.started = None
+
+    @property
+    def busy(self) -> bool:
+        return self.started is not None
+
+    def submit(self, item):
+        self.item = item
+        self.started = time.monotonic()
+        self.conn.send(item)
+
+    def finish(self) -> object:
+        item = self.item
+        self.item = None
+        self.started = None
+        return item
+
+    def stop(self, timeout: float = 1.0):
+        if not self.busy:
+            try:
+                self.conn.send(_STOP)
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class IsolatedExecutor:
+    """Runs tasks in worker processes with a per-task wall-time and memory limit.
+
+    Each imap_unordered call starts up to max_workers long-lived workers, which
+    receive the function once and then convert many items. A task that hangs
+    or blows up only takes its own worker down; it is replaced on demand and
+    the other workers keep running. The memory limit applies to what a task
+    allocates beyond the worker's size when the task starts. One executor can
+    be shared between threads (e.g. one per project in batch mode): max_workers
+    caps the processes across all of them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[int] = None, poll_interval: float = 0.05):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.poll_interval = poll_interval
+        self._context = _get_context()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def imap_unordered(self, func: Callable, items: Iterable) -> Iterator[Tuple[object, str, object]]:
+        """Yield (item, status, result) tuples as tasks finish.
+
+        Items are pulled lazily, only when a worker is free. For failed tasks
+        the result is an error message.
+        """
+        items = iter(items)
+        workers = []
+
+        try:
+            yield from self._run(func, items, workers)
+        finally:
+            # Done, or the consumer stopped early: don't leave workers or slots behind
+            for worker in workers:
+                worker.stop()
+                self._slots.release()
+
+    def _run(self, func: Callable, items: Iterator, workers: List[_Worker]):
+        exhausted = False
+
+        while not exhausted or any(worker.busy for worker in workers):
+            while not exhausted:
+                worker = next((worker for worker in workers if not worker.busy), None)
+                # Only block for a free slot when there is nothing of our own to poll
+                if worker is None and not self._slots.acquire(blocking=not workers):
+                    break
+                try:
+                    item = next(items)
+                except StopIteration:
+                    if worker is None:
+                        self._slots.release()
+                    exhausted = True
+                    break
+                if worker is None:
+                    worker = _Worker(self._context, func, self.memory_limit_mb)
+                    workers.append(worker)
+                worker.submit(item)
+
+            busy = [worker for worker in workers if worker.busy]
+            if not busy:
+                continue
+            ready = wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                         timeout=self.poll_interval)
+
+            finished = []
+            for worker in busy:
+                if worker.conn in ready or worker.conn.poll():
+                    try:
+                        status, result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        status, result = self._crash_status(worker.process)
+                elif worker.process.sentinel in ready or not worker.process.is_alive():
+                    status, result = self._crash_status(worker.process)
+                elif self.timeout and time.monotonic() - worker.started > self.timeout:
+                    worker.process.kill()
+                    status, result = STATUS_TIMEOUT, f"Exceeded time limit of {self.timeout} seconds"
+                else:
+                    continue
+                finished.append((worker, status, result))
+
+            for worker, status, result in finished:
+                item = worker.finish()
+                if status not in (STATUS_OK, STATUS_ERROR):
+                    # Timed out, crashed or out of memory: replace the worker when next needed
+                    worker.stop()
+                    workers.remove(worker)
+                    self._slots.release()
+                yield item, status, result
+
+    def _crash_status(self, process) -> Tuple[str, str]:
+        process.join()
+        return STATUS_CRASHED, f"Worker process exited unexpectedly (exit code {process.exitcode})"
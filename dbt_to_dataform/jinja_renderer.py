@@ -0,0 +1,211 @@
+# jinja_renderer.py
+
+from pathlib import Path
+from jinja2 import FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
+from jinja2.sandbox import SandboxedEnvironment
+
+from dbt_to_dataform.cache import user_cache_dir
+
+
+class _Relation(str):
+    """A rendered relation: renders as Dataform syntax, reprs as the dbt call.
+
+    The repr is used when a relation is passed to a package macro we re-emit
+    for the regular converter (e.g. dbt_utils.star(ref('x'))).
+    """
+
+    def __new__(cls, rendered: str, dbt_call: str):
+        relation = super().__new__(cls, rendered)
+        relation.dbt_call = dbt_call
+        return relation
+
+    def __repr__(self):
+        return self.dbt_call
+
+
+class _MacroReturn(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class _PassthroughCall:
+    """Re-emits package macro calls as `{{ package.macro(...) }}` for ModelConverter to convert."""
+
+    # Checked by the Jinja sandbox; must not fall through to __getattr__
+    unsafe_callable = False
+    alters_data = False
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        return _PassthroughCall(f"{self.name}.{attribute}")
+
+    def __call__(self, *args, **kwargs):
+        arguments = [repr(a) for a in args] + [f"{k}={repr(v)}" for k, v in kwargs.items()]
+        return f"{{{{ {self.name}({', '.join(arguments)}) }}}}"
+
+
+class _Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class JinjaRenderer:
+    """Renders dbt models through a sandboxed Jinja2 environment.
+
+    ref, source, var, config, is_incremental and this are shims emitting
+    Dataform syntax, and the project's macros are loaded from macros/, so no
+    LLM calls are needed. The environment and macros are built once per
+    renderer: in a conversion worker, once per worker, which then keeps every
+    compiled template in memory for the models it renders. Templates are also
+    cached as bytecode in the user cache directory, so new workers and later
+    runs skip compiling.
+    """
+
+    def __init__(self, dbt_project_path: Path, model_converter, project_variables: dict, cache_dir: Path = None):
+        self.dbt_project_path = Path(dbt_project_path)
+        self.model_converter = model_converter
+        self.project_variables = project_variables or {}
+        self.cache_dir = cache_dir
+        self._config = {}
+        self._incremental = False
+        self.macro_names = self._build_environment()
+
+    def __getstate__(self):
+        # Each conversion worker receives the renderer pickled, once. The environment
+        # holds closures, so the worker rebuilds it on first use (from the bytecode
+        # cache) and keeps it for every model it renders.
+        state = dict(self.__dict__)
+        state['env'] = None
+        return state
+
+    def _build_environment(self) -> list:
+        self.env = SandboxedEnvironment(
+            loader=FileSystemLoader(str(self.dbt_project_path)),
+            bytecode_cache=FileSystemBytecodeCache(str(self.cache_dir or user_cache_dir('jinja'))),
+            undefined=StrictUndefined,
+            cache_size=-1,
+            extensions=['jinja2.ext.do', 'jinja2.ext.loopcontrols']
+        )
+        self.env.globals.update(self._shims())
+        return self._load_macros()
+
+    def _shims(self) -> dict:
+        def ref(*args, **kwargs):
+            name = args[-1]
+            return _Relation(self.model_converter._ref_replacement(name), f"ref('{name}')")
+
+        def source(source_name, table_name):
+            return _Relation(self.model_converter._source_replacement(table_name),
+                             f"source('{source_name}', '{table_name}')")
+
+        def var(name, default=None):
+            value = self.project_variables.get(name, default)
+            # Structured and boolean values drive Jinja logic, so they are rendered now;
+            # scalars stay configurable through the Dataform project config
+            if name in self.project_variables and not isinstance(value, (list, dict, bool)):
+                return f"${{dataform.projectConfig.vars.{name}}}"
+            return value
+
+        def config(*args, **kwargs):
+            self._config.update(kwargs)
+            return ''
+
+        def is_incremental():
+            return self._incremental
+
+        def return_(value):
+            raise _MacroReturn(value)
+
+        def env_var(name, default=''):
+            # Never read the converting machine's environment into the output
+            return default
+
+        def dispatch(macro_name, macro_namespace=None, packages=None):
+            for candidate in (f"bigquery__{macro_name}", f"default__{macro_name}", macro_name):
+                if candidate in self.env.globals:
+                    return self.env.globals[candidate]
+            raise NameError(f"Cannot dispatch macro {macro_name}")
+
+        shims = {name: _PassthroughCall(name) for name in self.model_converter.package_functions}
+        shims.update({
+            'ref': ref,
+            'source': source,
+            'var': var,
+            'config': config,
+            'is_incremental': is_incremental,
+            'this': _Relation("${self()}", "this"),
+            'return': return_,
+            'env_var': env_var,
+            'log': lambda *args, **kwargs: '',
+            'target': _Namespace(name='prod', type='bigquery', schema='${dataform.projectConfig.defaultSchema}',
+                                 project='${dataform.projectConfig.defaultDatabase}',
+                                 database='${dataform.projectConfig.defaultDatabase}'),
+            'adapter': _Namespace(dispatch=dispatch),
+            'dbt_utils': _PassthroughCall('dbt_utils'),
+            'dbt': _PassthroughCall('dbt'),
+        })
+        return shims
+
+    def _load_macros(self) -> list:
+        """Compile every macro file once and expose its macros as globals."""
+        macros_dir = self.dbt_project_path / 'macros'
+        names = []
+        if not macros_dir.exists():
+            return names
+
+        for macro_file in sorted(macros_dir.rglob('*.sql')):
+            template_name = macro_file.relative_to(self.dbt_project_path).as_posix()
+            try:
+                module = self.env.get_template(template_name).make_module()
+            except Exception as e:
+                print(f"Could not load macros from {macro_file}: {str(e)}")
+                continue
+            for name in dir(module):
+                macro = getattr(module, name)
+                if name.startswith('_') or not callable(macro):
+                    continue
+                self.env.globals[name] = self._wrap_macro(macro)
+                names.append(name)
+        return names
+
+    def _wrap_macro(self, macro):
+        def call(*args, **kwargs):
+            try:
+                return macro(*args, **kwargs)
+            except _MacroReturn as result:
+                return result.value
+        return call
+
+    def render_model(self, dbt_model_path: Path) -> tuple:
+        """Render a model and return (config dict, Dataform SQL).
+
+        The model is rendered for a full refresh and an incremental run; if the
+        two differ they are combined with Dataform's when(incremental(), ...).
+        """
+        if self.env is None:
+            self._build_environment()
+        template_name = Path(dbt_model_path).resolve().relative_to(self.dbt_project_path.resolve()).as_posix()
+        template = self.env.get_template(template_name)
+
+        self._config = {}
+        self._incremental = False
+        full_refresh = template.render().strip()
+        config = dict(self._config)
+
+        self._incremental = True
+        incremental = template.render().strip()
+        self._incremental = False
+        # This SQL only runs incrementally, so self-referencing filters can use watermarks
+        incremental = self.model_converter.replace_self_aggregates(incremental)
+
+        if incremental == full_refresh:
+            return config, full_refresh
+        return config, f"${{when(incremental(), `{self._escape(incremental)}`, `{self._escape(full_refresh)}`)}}"
+
+    def _escape(self, sql: str) -> str:
+        # Keep ${...} interpolations but escape characters special to JS template literals
+        return sql.replace('\\', '\\\\').replace('`', '\\`')
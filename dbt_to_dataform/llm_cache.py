@@ -0,0 +1,47 @@
+# llm_cache.py
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from dbt_to_dataform.cache import user_cache_dir
+
+
+class LLMResponseCache:
+    """Disk-backed cache of LLM responses keyed by model name and prompt.
+
+    Shared by MacroConverter and SyntaxChecker, and across projects and runs,
+    so an identical prompt is only ever paid for once.
+    """
+
+    def __init__(self, cache_dir: Path = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else user_cache_dir('llm')
+
+    def _path(self, model: str, prompt: str) -> Path:
+        key = hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def contains(self, model: str, prompt: str) -> bool:
+        return self._path(model, prompt).exists()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        path = self._path(model, prompt)
+        if not path.exists():
+            return None
+        return path.read_text()
+
+    def put(self, model: str, prompt: str, response: str):
+        path = self._path(model, prompt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a uniquely named file then rename, so concurrent writers
+        # (threads included) never share a temp file and readers never see a partial response
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(response)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,13 +1,24 @@
 # macro_converter.py
 
+import re
 from pathlib import Path
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 
+from dbt_to_dataform.checkpoint_journal import CheckpointJournal, content_fingerprint
+from dbt_to_dataform.conversion_report import ConversionReport
+from dbt_to_dataform.llm_cache import LLMResponseCache
+from dbt_to_dataform.macro_index import MacroIndex
+from dbt_to_dataform.package_cache import PackageCache
+
 class MacroConverter:
-    def __init__(self, openai_api_key):
-        self.llm = ChatOpenAI(temperature=0.2, model_name="gpt-3.5-turbo", openai_api_key=openai_api_key)
+    MODEL_NAME = "gpt-3.5-turbo"
+
+    def __init__(self, openai_api_key, llm_cache: LLMResponseCache = None):
+        self.llm_cache = llm_cache
+        # Without a key the converter can only build prompts, e.g. for --plan
+        self.llm = ChatOpenAI(temperature=0.2, model_name=self.MODEL_NAME, openai_api_key=openai_api_key) if openai_api_key else None
         self.macro_conversion_prompt = ChatPromptTemplate.from_template("""
             Convert the following dbt macro to a JavaScript function for Dataform:
 
@@ -23,24 +34,132 @@ class MacroConverter:
 
             Provide only the converted JavaScript function:
             """)
-        self.macro_conversion_chain = LLMChain(llm=self.llm, prompt=self.macro_conversion_prompt)
+        self.macro_conversion_chain = LLMChain(llm=self.llm, prompt=self.macro_conversion_prompt) if self.llm else None
 
-    def convert_macros(self, dbt_project_path: Path, dataform_output_path: Path):
-        macros_dir = Path(dbt_project_path) / 'macros'
+    def convert_macros(self, dbt_project_path: Path, dataform_output_path: Path,
+                       conversion_report: ConversionReport = None, macro_index: MacroIndex = None,
+                       journal: CheckpointJournal = None):
+        """Convert the project's macros to includes, skipping macros nothing calls.
+
+        With a journal, macro files an earlier run converted from the same source
+        are skipped and each newly converted file is recorded.
+        """
         dataform_includes_dir = Path(dataform_output_path) / 'includes'
         dataform_includes_dir.mkdir(parents=True, exist_ok=True)
 
-        for macro_file in macros_dir.glob('*.sql'):
-            with open(macro_file, 'r') as f:
-                macro_content = f.read()
+        for macro_file, macro_content in self._macro_sources(dbt_project_path, conversion_report, macro_index):
+            unit = f"macro:{macro_file.relative_to(dbt_project_path).as_posix()}"
+            fingerprint = content_fingerprint(macro_content)
+            if journal and journal.is_done(unit, fingerprint):
+                continue
 
-            converted_js = self.macro_conversion_chain.run(macro_content=macro_content)
+            converted_js = self._convert_macro_content(macro_content)
 
             output_file = dataform_includes_dir / f"{macro_file.stem}.js"
             with open(output_file, 'w') as f:
                 f.write(converted_js.strip())  # Remove any leading/trailing whitespace
 
             print(f"Converted {macro_file.name} to {output_file.name}")
+            if journal:
+                journal.record(unit, fingerprint=fingerprint)
+
+    def _macro_sources(self, dbt_project_path: Path, conversion_report: ConversionReport = None,
+                       macro_index: MacroIndex = None):
+        """Yield (macro file, source to convert) for every macro file defining used macros."""
+        macros_dir = Path(dbt_project_path) / 'macros'
+        macro_index = macro_index or MacroIndex.build(dbt_project_path)
+        reachable = macro_index.reachable()
+
+        for macro_file in macros_dir.glob('*.sql'):
+            with open(macro_file, 'r') as f:
+                macro_content = f.read()
+
+            defined = macro_index.macros_in(macro_file)
+            unused = [name for name in defined if name not in reachable]
+            if unused:
+                print(f"Skipping unused macros in {macro_file.name}: {', '.join(unused)}")
+                if conversion_report:
+                    conversion_report.add_issue(
+                        str(macro_file),
+                        "Unused Macro Skipped",
+                        f"The macros {', '.join(unused)} are not called by any model, test, hook or used macro and were not converted."
+                    )
+                if len(unused) == len(defined):
+                    continue
+                # Only send the macros that are actually used
+                macro_content = macro_index.reachable_source(macro_file, reachable)
+
+            yield macro_file, macro_content
+
+    def _package_sources(self, package_path: Path):
+        for macro_file in sorted((package_path / 'macros').rglob('*.sql')):
+            with open(macro_file, 'r') as f:
+                yield macro_file, f.read()
+
+    def plan_requests(self, dbt_project_path: Path, package_cache: PackageCache) -> list:
+        """Return (kind, file, prompt, macro source) for every request a conversion would send,
+        without sending any. kind is 'package' or 'macro'; cached packages send nothing."""
+        requests = []
+        for name, version, package_path in package_cache.find_packages(dbt_project_path):
+            if package_cache.get(name, version) is None:
+                requests.extend(('package', macro_file, self._prompt(content), content)
+                                for macro_file, content in self._package_sources(package_path))
+        requests.extend(('macro', macro_file, self._prompt(content), content)
+                        for macro_file, content in self._macro_sources(dbt_project_path))
+        return requests
+
+    def _prompt(self, macro_content: str) -> str:
+        return self.macro_conversion_prompt.format(macro_content=macro_content)
+
+    def _convert_macro_content(self, macro_content: str) -> str:
+        prompt = self._prompt(macro_content)
+        if self.llm_cache:
+            cached = self.llm_cache.get(self.MODEL_NAME, prompt)
+            if cached is not None:
+                return cached
+
+        converted_js = self.macro_conversion_chain.run(macro_content=macro_content)
+
+        if self.llm_cache:
+            self.llm_cache.put(self.MODEL_NAME, prompt, converted_js)
+        return converted_js
+
+    def convert_packages(self, dbt_project_path: Path, dataform_output_path: Path, package_cache: PackageCache) -> dict:
+        """Convert installed dbt packages to includes, reusing cached conversions.
+
+        Returns a dict of package name -> exported function names.
+        """
+        includes_dir = Path(dataform_output_path) / 'includes'
+        package_functions = {}
+
+        for name, version, package_path in package_cache.find_packages(dbt_project_path):
+            # Another project may be converting the same package: wait for it and use its result
+            with package_cache.conversion_lock(name, version):
+                functions = package_cache.get(name, version)
+                if functions is None:
+                    print(f"Converting package {name} {version}...")
+                    converted = [self._convert_macro_content(content).strip()
+                                 for _, content in self._package_sources(package_path)]
+                    js_content, functions = self._combine_package_functions(converted)
+                    package_cache.put(name, version, js_content, functions)
+                else:
+                    print(f"Using cached conversion of package {name} {version}")
+
+            package_cache.install(name, version, includes_dir)
+            package_functions[name] = functions
+
+        return package_functions
+
+    def _combine_package_functions(self, converted_functions: list) -> tuple:
+        # Only top-level declarations are exported, not locals inside function bodies
+        content = "\n\n".join(converted_functions)
+        functions = []
+        for match in re.finditer(r'^(?:async\s+)?function\s+(\w+)|^(?:const|let|var)\s+(\w+)\s*=', content, re.MULTILINE):
+            name = match.group(1) or match.group(2)
+            if name not in functions:
+                functions.append(name)
+        content += "\n\nmodule.exports = { " + ", ".join(functions) + " };\n"
+        return content, functions
 
     def update_macro_references(self, dataform_output_path: Path):
         definitions_dir = Path(dataform_output_path) / 'definitions'
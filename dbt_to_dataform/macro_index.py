@@ -0,0 +1,126 @@
+# macro_index.py
+
+import re
+from pathlib import Path
+from typing import Dict, List, Set
+
+from dbt_to_dataform.repository_analyzer import RepositoryAnalyzer
+
+
+class MacroIndex:
+    """Index of a dbt project's macro definitions and the places that call them.
+
+    Call sites are collected from models, snapshots, tests, analyses, macros
+    and YAML files (hooks and generic tests). A macro is reachable if it is
+    called from outside the macros, directly or through other macros, so
+    unused legacy macros can be left unconverted. dbt itself calls the
+    generate_*_name overrides and custom materializations, so those are
+    always reachable.
+    """
+
+    DEFINITION_PATTERN = re.compile(r'\{%-?\s*(macro|test)\s+(\w+)\s*\(')
+    # {% materialization name, adapter='bigquery' %} or {% materialization name, default %}
+    MATERIALIZATION_PATTERN = re.compile(
+        r'\{%-?\s*materialization\s+(\w+)\s*,\s*(?:adapter\s*=\s*)?[\'"]?(\w+)')
+    END_PATTERN = re.compile(r'\{%-?\s*end(?:macro|test|materialization)\s*-?%\}')
+    BUILTIN_OVERRIDES = ('generate_schema_name', 'generate_alias_name', 'generate_database_name')
+    DISPATCH_PATTERN = re.compile(r'adapter\.dispatch\(\s*[\'"](\w+)[\'"]')
+    ROOT_DIRS = ('models', 'snapshots', 'tests', 'analyses')
+    MACRO_DIRS = ('macros', 'tests')
+
+    def __init__(self):
+        # macro name -> (file, source of the macro block)
+        self.definitions: Dict[str, tuple] = {}
+        # macro name -> macros it calls
+        self.calls: Dict[str, Set[str]] = {}
+        # generic test macros are defined as `test <name>` and referenced from YAML by name
+        self.tests: Set[str] = set()
+        self.roots: Set[str] = set()
+
+    @classmethod
+    def build(cls, dbt_project_path: Path) -> 'MacroIndex':
+        index = cls()
+        dbt_project_path = Path(dbt_project_path)
+
+        for directory in cls.MACRO_DIRS:
+            for path in sorted(index._project_files(dbt_project_path / directory, '*.sql')):
+                index._add_definitions(path, path.read_text())
+
+        index.roots |= {name for name in cls.BUILTIN_OVERRIDES if name in index.definitions}
+        call_pattern = index._call_pattern()
+        if call_pattern is None:
+            return index
+
+        for name, (_, source) in index.definitions.items():
+            index.calls[name] = index._find_calls(source, call_pattern) - {name}
+
+        for directory in cls.ROOT_DIRS:
+            for path in index._project_files(dbt_project_path / directory, '*.sql'):
+                index.roots |= index._find_calls(index._outside_definitions(path.read_text()), call_pattern)
+        for path in index._project_files(dbt_project_path, '*.yml'):
+            content = path.read_text()
+            index.roots |= index._find_calls(content, call_pattern)
+            index.roots |= {name for name in index.tests if re.search(rf'\b{name}\b', content)}
+        return index
+
+    def _project_files(self, directory: Path, pattern: str) -> List[Path]:
+        if not directory.exists():
+            return []
+        return [path for path in directory.rglob(pattern)
+                if not set(path.relative_to(directory).parts) & RepositoryAnalyzer.SKIPPED_DIRS]
+
+    def _add_definitions(self, path: Path, content: str):
+        for match in self.DEFINITION_PATTERN.finditer(content):
+            kind, name = match.groups()
+            end = self.END_PATTERN.search(content, match.end())
+            block_end = end.end() if end else len(content)
+            if kind == 'test':
+                self.tests.add(name)
+                name = f"test_{name}"
+            self.definitions[name] = (path, content[match.start():block_end])
+        for match in self.MATERIALIZATION_PATTERN.finditer(content):
+            end = self.END_PATTERN.search(content, match.end())
+            name = f"materialization_{match.group(1)}_{match.group(2)}"
+            self.definitions[name] = (path, content[match.start():end.end() if end else len(content)])
+            self.roots.add(name)
+
+    def _outside_definitions(self, content: str) -> str:
+        # Macros defined inside a test or model file only count when called
+        for _, source in self.definitions.values():
+            content = content.replace(source, '')
+        return content
+
+    def _call_pattern(self):
+        names = sorted(self.definitions, key=len, reverse=True)
+        if not names:
+            return None
+        return re.compile(r'\b(' + '|'.join(re.escape(name) for name in names) + r')\s*\(')
+
+    def _find_calls(self, content: str, call_pattern) -> Set[str]:
+        called = set(call_pattern.findall(content))
+        # adapter.dispatch('x') resolves to x or one of its <adapter>__x implementations
+        for dispatched in self.DISPATCH_PATTERN.findall(content):
+            called |= {name for name in self.definitions
+                       if name == dispatched or name.endswith(f"__{dispatched}")}
+        return called
+
+    def reachable(self) -> Set[str]:
+        """Return the macros called, directly or transitively, from outside the macros."""
+        # Generic tests are defined as test_<name> but referenced from YAML by name
+        pending = [name for name in self.roots if name in self.definitions]
+        pending += [f"test_{name}" for name in self.roots & self.tests]
+        seen = set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            pending.extend(self.calls.get(name, ()))
+        return seen
+
+    def macros_in(self, path: Path) -> List[str]:
+        return [name for name, (file, _) in self.definitions.items() if file == Path(path)]
+
+    def reachable_source(self, path: Path, reachable: Set[str]) -> str:
+        """Return the source of the reachable macros defined in a file, in file order."""
+        return "\n\n".join(self.definitions[name][1] for name in self.macros_in(path) if name in reachable)
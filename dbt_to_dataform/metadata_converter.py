@@ -1,12 +1,16 @@
 # metadata_converter.py
 
-import yaml
 from pathlib import Path
 
+from dbt_to_dataform.yaml_cache import load_yaml
+
 class MetadataConverter:
+    def __init__(self, include_tests: bool = True):
+        # Tests can instead be converted to combined assertions by AssertionConverter
+        self.include_tests = include_tests
+
     def convert_schema_yml(self, schema_path: Path) -> str:
-        with open(schema_path, 'r') as f:
-            dbt_schema = yaml.safe_load(f)
+        dbt_schema = load_yaml(schema_path)
         
         dataform_js = "module.exports = {\n"
         
@@ -26,7 +30,7 @@ class MetadataConverter:
                     dataform_js += f"      {column['name']}: {{\n"
                     if 'description' in column:
                         dataform_js += f"        description: \"{column['description']}\",\n"
-                    if 'tests' in column:
+                    if self.include_tests and 'tests' in column:
                         dataform_js += "        tests: [\n"
                         for test in column['tests']:
                             if isinstance(test, str):
@@ -1,28 +1,76 @@
+import ast
+import json
 import re
 from pathlib import Path
 import yaml
 
+from dbt_to_dataform.column_index import ColumnIndex
+
+
+class _JinjaConstants(ast.NodeTransformer):
+    """Turns Jinja's true, false and none, at any depth, into Python constants."""
+
+    CONSTANTS = {'true': True, 'false': False, 'none': None}
+
+    def visit_Name(self, node):
+        if node.id.lower() in self.CONSTANTS:
+            return ast.copy_location(ast.Constant(self.CONSTANTS[node.id.lower()]), node)
+        return node
+
+
 class ModelConverter:
-    def __init__(self, project_variables: dict, dbt_models_dir: Path, source_tables: set):
+    def __init__(self, project_variables: dict, dbt_models_dir: Path, source_tables: set, column_index: ColumnIndex = None):
         self.project_variables = project_variables
         self.dbt_models_dir = dbt_models_dir
         self.source_tables = source_tables
+        self.column_index = column_index
+        self.jinja_renderer = None
+        # Converted dbt packages available as includes: package name -> function names
+        self.package_functions = {}
+        self.issues = []
+        # Watermark variables declared in the current model's pre_operations: name -> query
+        self.watermarks = {}
+
+    def enable_jinja_rendering(self, dbt_project_path: Path):
+        """Render models through a sandboxed Jinja environment instead of regex conversion."""
+        from dbt_to_dataform.jinja_renderer import JinjaRenderer
+        self.jinja_renderer = JinjaRenderer(dbt_project_path, self, self.project_variables)
+        print(f"Loaded {len(self.jinja_renderer.macro_names)} project macros for Jinja rendering")
+
+    def convert_model_collecting_issues(self, dbt_model_path: Path) -> tuple:
+        """Convert a model and return its result together with the issues found.
+
+        Used from worker processes, where issues can't be added to the shared report.
+        """
+        self.issues = []
+        result = self.convert_model(dbt_model_path)
+        return result, self.issues
+
+    def _add_issue(self, issue_type: str, description: str):
+        self.issues.append({"type": issue_type, "description": description})
 
     def convert_model(self, dbt_model_path: Path) -> tuple:
             try:
                 with open(dbt_model_path, 'r') as f:
                     dbt_content = f.read()
+                self.watermarks = {}
 
-                # Convert config block
-                config_block = self._convert_config(dbt_content)
+                rendered = self._render_with_jinja(dbt_model_path) if self.jinja_renderer else None
+                if rendered:
+                    config_block, sql_content = rendered
+                else:
+                    # Convert config block
+                    config_block = self._convert_config(dbt_content)
 
-                # Convert SQL content
-                sql_content = self._convert_sql(dbt_content)
+                    # Convert SQL content
+                    sql_content = self._convert_sql(dbt_content)
 
                 if sql_content is None:
                     raise ValueError("SQL content conversion failed")
 
                 sqlx_content = f"{config_block}\n\n{sql_content}"
+                if self.watermarks:
+                    sqlx_content = f"{config_block}\n\n{self._pre_operations_block()}\n\n{sql_content}"
 
                 # Determine the appropriate output directory
                 if 'marts' in str(dbt_model_path) or self._is_final_model(dbt_content):
@@ -41,6 +89,9 @@ class ModelConverter:
 
                 return sqlx_content, output_dir, output_file
 
+            except MemoryError:
+                # Let the isolated worker report this as a memory limit breach
+                raise
             except Exception as e:
                 print(f"Error in convert_model for {dbt_model_path}: {str(e)}")
                 print("Traceback:")
@@ -49,48 +100,242 @@ class ModelConverter:
                 return None, None, None
 
 
+    def _render_with_jinja(self, dbt_model_path: Path):
+        """Return (config block, SQL) rendered by Jinja, or None to fall back to regex conversion."""
+        try:
+            config_dict, sql_content = self.jinja_renderer.render_model(dbt_model_path)
+        except Exception as e:
+            self.watermarks = {}
+            self._add_issue(
+                "Jinja Render Fallback",
+                f"Jinja rendering failed ({type(e).__name__}: {str(e)}); the model was converted with the regex converter instead."
+            )
+            return None
+
+        config_block = self._convert_config_dict(config_dict) if config_dict else "config {\n  type: \"table\"\n}"
+        # Package macro calls are re-emitted as {{ ... }} and converted here
+        return config_block, self._convert_macros(sql_content).strip()
+
     def _is_final_model(self, content: str) -> bool:
         # Implement logic to determine if a model is a final output
         # This is a placeholder implementation
         return False
 
+    # dbt configs mapped onto Dataform's bigquery block and incremental options
+    BIGQUERY_CONFIG_KEYS = ['partition_by', 'cluster_by', 'require_partition_filter', 'partition_expiration_days', 'labels']
+    INCREMENTAL_CONFIG_KEYS = ['unique_key', 'incremental_strategy', 'incremental_predicates']
+
+    # dbt-bigquery configs that have no Dataform equivalent
+    UNMAPPABLE_BIGQUERY_CONFIGS = [
+        'kms_key_name', 'hours_to_expiration', 'grant_access_to', 'grants',
+        'partitions', 'copy_partitions', 'on_schema_change'
+    ]
+
     def _convert_config(self, content: str) -> str:
         config_match = re.search(r'\{\{\s*config\((.*?)\)\s*\}\}', content, re.DOTALL)
         if config_match:
             config_content = config_match.group(1)
-            config_dict = yaml.safe_load(f"config: {{{config_content}}}")['config']
-            config_items = []
-            
-            # Set default type if not specified
-            if 'materialized' not in config_dict:
-                config_items.append("  type: \"table\"")
-            
-            for k, v in config_dict.items():
-                if k == 'materialized':
-                    config_items.append(f"  type: \"{v}\"")
-                elif k == 'enabled':
-                    if isinstance(v, str) and v.startswith('var('):
-                        var_name = re.search(r'var\([\'"](\w+)[\'"]\)', v).group(1)
-                        config_items.append(f"  disabled: ${{!dataform.projectConfig.vars.{var_name}}}")
-                    else:
-                        config_items.append(f"  disabled: {str(not v).lower()}")
-                else:
-                    config_items.append(f"  {k}: {self._format_config_value(v)}")
-            
-            return "config {\n" + ",\n".join(config_items) + "\n}"
+            return self._convert_config_dict(self._parse_config_args(config_content))
         return "config {\n  type: \"table\"\n}"
 
+    def _convert_config_dict(self, config_dict: dict) -> str:
+        config_items = []
+        
+        # Set default type if not specified
+        if 'materialized' not in config_dict:
+            config_items.append("  type: \"table\"")
+
+        bigquery_items = self._convert_bigquery_config(config_dict)
+        incremental_items = self._convert_incremental_config(config_dict, bigquery_items)
+        
+        for k, v in config_dict.items():
+            if k in self.BIGQUERY_CONFIG_KEYS or k in self.INCREMENTAL_CONFIG_KEYS:
+                continue
+            if k in self.UNMAPPABLE_BIGQUERY_CONFIGS:
+                self._add_issue(
+                    "Unmapped BigQuery Config",
+                    f"The dbt config '{k}' has no Dataform equivalent and was dropped: {v}"
+                )
+                continue
+            if k == 'materialized':
+                config_items.append(f"  type: \"{v}\"")
+            elif k == 'enabled':
+                if isinstance(v, str) and v.startswith('var('):
+                    var_name = re.search(r'var\([\'"](\w+)[\'"]\)', v).group(1)
+                    config_items.append(f"  disabled: ${{!dataform.projectConfig.vars.{var_name}}}")
+                elif isinstance(v, str) and v.startswith('${dataform.projectConfig.vars.'):
+                    # Already rendered by the Jinja var() shim
+                    config_items.append(f"  disabled: ${{!{v[2:-1]}}}")
+                else:
+                    config_items.append(f"  disabled: {str(not v).lower()}")
+            else:
+                config_items.append(f"  {k}: {self._format_config_value(v)}")
+
+        config_items.extend(incremental_items)
+        if bigquery_items:
+            config_items.append("  bigquery: {\n" + ",\n".join(bigquery_items) + "\n  }")
+        
+        return "config {\n" + ",\n".join(config_items) + "\n}"
+
+    def _convert_bigquery_config(self, config_dict: dict) -> list:
+        """Map dbt-bigquery table options onto Dataform's `bigquery: {...}` block."""
+        items = []
+
+        partition_by = config_dict.get('partition_by')
+        if partition_by:
+            partition_expression = self._partition_expression(partition_by)
+            if partition_expression:
+                items.append(f"    partitionBy: {json.dumps(partition_expression)}")
+            else:
+                self._add_issue(
+                    "Unmapped BigQuery Config",
+                    f"Could not convert partition_by to a Dataform partitionBy expression: {partition_by}"
+                )
+            if isinstance(partition_by, dict) and partition_by.get('copy_partitions'):
+                self._add_issue(
+                    "Unmapped BigQuery Config",
+                    "partition_by.copy_partitions has no Dataform equivalent and was dropped; "
+                    "partitions are replaced by a query instead of a copy job."
+                )
+
+        cluster_by = config_dict.get('cluster_by')
+        if cluster_by:
+            cluster_columns = [cluster_by] if isinstance(cluster_by, str) else list(cluster_by)
+            items.append(f"    clusterBy: {json.dumps(cluster_columns)}")
+
+        if 'require_partition_filter' in config_dict:
+            items.append(f"    requirePartitionFilter: {self._format_config_value(bool(config_dict['require_partition_filter']))}")
+
+        if config_dict.get('partition_expiration_days') is not None:
+            items.append(f"    partitionExpirationDays: {config_dict['partition_expiration_days']}")
+
+        labels = config_dict.get('labels')
+        if isinstance(labels, dict) and labels:
+            # BigQuery label values are strings
+            labels = {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in labels.items()}
+            items.append(f"    labels: {json.dumps(labels)}")
+        elif labels:
+            self._add_issue("Unmapped BigQuery Config", f"Could not convert labels to Dataform labels: {labels}")
+
+        return items
+
+    def _partition_expression(self, partition_by):
+        if isinstance(partition_by, str):
+            # Legacy dbt syntax where partition_by is already a SQL expression;
+            # a dict that couldn't be parsed is kept as text and can't be used
+            return None if partition_by.lstrip().startswith('{') else partition_by
+        if not isinstance(partition_by, dict) or not partition_by.get('field'):
+            return None
+        if partition_by.get('time_ingestion_partitioning'):
+            return None
+
+        field = partition_by['field']
+        data_type = str(partition_by.get('data_type', 'date')).lower()
+        granularity = str(partition_by.get('granularity', 'day')).upper()
+
+        if data_type == 'date':
+            return field if granularity == 'DAY' else f"DATE_TRUNC({field}, {granularity})"
+        if data_type == 'timestamp':
+            return f"TIMESTAMP_TRUNC({field}, {granularity})"
+        if data_type == 'datetime':
+            return f"DATETIME_TRUNC({field}, {granularity})"
+        if data_type in ('int64', 'integer', 'int'):
+            bucket_range = partition_by.get('range') or {}
+            if not all(k in bucket_range for k in ('start', 'end', 'interval')):
+                return None
+            return f"RANGE_BUCKET({field}, GENERATE_ARRAY({bucket_range['start']}, {bucket_range['end']}, {bucket_range['interval']}))"
+        return None
+
+    def _convert_incremental_config(self, config_dict: dict, bigquery_items: list) -> list:
+        """Map dbt incremental options onto Dataform's uniqueKey and updatePartitionFilter.
+
+        updatePartitionFilter belongs in the bigquery block, so it is appended to bigquery_items.
+        """
+        if config_dict.get('materialized') != 'incremental':
+            return []
+
+        items = []
+        strategy = config_dict.get('incremental_strategy', 'merge')
+        if strategy not in ('merge', 'append'):
+            self._add_issue(
+                "Unmapped BigQuery Config",
+                f"The incremental_strategy '{strategy}' has no Dataform equivalent; the model will use "
+                "a MERGE on uniqueKey if set, or append otherwise."
+            )
+
+        unique_key = config_dict.get('unique_key')
+        if unique_key and strategy != 'append':
+            unique_columns = [unique_key] if isinstance(unique_key, str) else list(unique_key)
+            items.append(f"  uniqueKey: {json.dumps(unique_columns)}")
+
+        predicates = config_dict.get('incremental_predicates')
+        if predicates:
+            update_filter = self._update_partition_filter(predicates)
+            if update_filter and unique_key:
+                bigquery_items.append(f"    updatePartitionFilter: {json.dumps(update_filter)}")
+            else:
+                self._add_issue(
+                    "Unmapped BigQuery Config",
+                    f"Could not convert incremental_predicates to a Dataform updatePartitionFilter: {predicates}"
+                )
+
+        return items
+
+    def _update_partition_filter(self, predicates):
+        """Rewrite dbt incremental_predicates as a Dataform updatePartitionFilter.
+
+        Dataform prefixes the filter with the target alias `T.`, so the first
+        predicate must start with a DBT_INTERNAL_DEST column.
+        """
+        if isinstance(predicates, str):
+            predicates = [predicates]
+        # The filter is appended to the MERGE condition with AND, so a top-level OR would change its meaning
+        if any(re.search(r'\bor\b', p, re.IGNORECASE) for p in predicates):
+            return None
+        if not re.match(r'^\s*DBT_INTERNAL_DEST\.', predicates[0], re.IGNORECASE):
+            return None
+        combined = " AND ".join(p.strip() for p in predicates)
+        combined = re.sub(r'DBT_INTERNAL_DEST\.', 'T.', combined, flags=re.IGNORECASE)
+        combined = re.sub(r'DBT_INTERNAL_SOURCE\.', 'S.', combined, flags=re.IGNORECASE)
+        return re.sub(r'^\s*T\.', '', combined)
+
+    def _parse_config_args(self, config_content: str) -> dict:
+        """Parse the keyword arguments of a dbt config() call into a dict.
+
+        Values that aren't Python literals (e.g. var('x')) are kept as source text.
+        """
+        source = f"config({config_content.strip()})"
+        try:
+            call = ast.parse(source, mode='eval').body
+        except SyntaxError:
+            return yaml.safe_load(f"config: {{{config_content}}}")['config']
+
+        config = {}
+        for keyword in call.keywords:
+            if keyword.arg is None:
+                continue
+            try:
+                config[keyword.arg] = ast.literal_eval(_JinjaConstants().visit(keyword.value))
+            except ValueError:
+                config[keyword.arg] = ast.get_source_segment(source, keyword.value)
+        return config
+
     def _format_config_value(self, value):
         if isinstance(value, str):
             return f"\"{value}\""
         elif isinstance(value, bool):
             return str(value).lower()
+        elif isinstance(value, (list, dict)):
+            return json.dumps(value)
         else:
             return str(value)
 
     def _convert_sql(self, content: str) -> str:
         # Remove config block
         sql_content = re.sub(r'\{\{\s*config\(.*?\)\s*\}\}', '', content, flags=re.DOTALL)
+
+        # Replace self-referencing incremental filters with watermark variables
+        sql_content = self._convert_incremental_watermarks(sql_content)
         
         # Convert set blocks
         sql_content = self._convert_set_blocks(sql_content)
@@ -118,6 +363,59 @@ class ModelConverter:
         
         return sql_content.strip()
 
+    # (select max(col) from {{ this }}), including coalesce(max(col), ...) and a table alias
+    SELF_AGGREGATE_PATTERN = re.compile(
+        r'\(\s*select\s+(?P<aggregate>(?:coalesce\s*\(\s*)?(?:max|min)\s*\(\s*(?P<column>[\w.`"]+)\s*\)'
+        r'(?:\s*,\s*[^()]*(?:\([^()]*\)[^()]*)*\))?)'
+        r'\s+from\s+(?:\{\{\s*this\s*\}\}|\$\{self\(\)\})(?P<alias>\s+(?:as\s+)?(?!where\b)\w+)?\s*\)',
+        re.IGNORECASE
+    )
+
+    def _convert_incremental_watermarks(self, content: str) -> str:
+        """Replace `(select max(ts) from {{ this }})` inside `{% if is_incremental() %}` blocks
+        with a variable declared once in pre_operations.
+
+        The inline subquery scans the target table wherever it appears; a
+        script variable is computed once and lets BigQuery prune partitions.
+        """
+        def replace_block(match):
+            return match.group(1) + self.replace_self_aggregates(match.group(2)) + match.group(3)
+
+        return re.sub(
+            r'(\{%-?\s*if\s+is_incremental\(\)\s*-?%\})(.*?)(\{%-?\s*(?:endif|else|elif\b))',
+            replace_block,
+            content,
+            flags=re.DOTALL
+        )
+
+    def replace_self_aggregates(self, sql: str) -> str:
+        """Replace self-referencing aggregates in SQL that only runs incrementally with watermark variables."""
+        def replace(match):
+            query = re.sub(r'\s+', ' ', match.group('aggregate') + " FROM ${self()}" + (match.group('alias') or ''))
+            for name, declared in self.watermarks.items():
+                if declared == query:
+                    return name
+            base = 'watermark_' + re.sub(r'\W', '_', match.group('column').split('.')[-1]).strip('_')
+            name = base
+            suffix = 2
+            while name in self.watermarks:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            self.watermarks[name] = query
+            return name
+
+        return self.SELF_AGGREGATE_PATTERN.sub(replace, sql)
+
+    def _pre_operations_block(self) -> str:
+        # On a full refresh the filter isn't used and the table may not exist yet
+        declarations = [
+            f"  DECLARE {name} DEFAULT (\n"
+            f"    ${{when(incremental(), `SELECT {query}`, `SELECT NULL`)}}\n"
+            f"  );"
+            for name, query in self.watermarks.items()
+        ]
+        return "pre_operations {\n" + "\n".join(declarations) + "\n}"
+
     def _convert_set_blocks(self, content: str) -> str:
         def replace_set(match):
             var_name, var_content = match.groups()
@@ -205,8 +503,67 @@ class ModelConverter:
         return content
 
     def _convert_dbt_utils_star(self, content: str) -> str:
-        pattern = r'{{\s*(?:dbt_utils|dbt)\.star\((from=)?ref\([\'"](\w+)[\'"]\)(?:,\s*except=\[[^\]]*\])?\)\s*}}'
-        return re.sub(pattern, '*', content)
+        def replace_star(match):
+            args = match.group(1)
+            relation_match = re.search(r'(ref|source)\(([^)]*)\)', args)
+            if not relation_match:
+                return match.group(0)
+            relation_args = re.findall(r'[\'"](\w+)[\'"]', relation_match.group(2))
+            if not relation_args:
+                return match.group(0)
+            relation_name = relation_args[-1]
+
+            except_match = re.search(r'except\s*=\s*\[([^\]]*)\]', args)
+            excluded = re.findall(r'[\'"]([^\'"]+)[\'"]', except_match.group(1)) if except_match else []
+            alias_match = re.search(r'relation_alias\s*=\s*[\'"](\w+)[\'"]', args)
+            prefix_match = re.search(r'prefix\s*=\s*[\'"](\w*)[\'"]', args)
+            suffix_match = re.search(r'suffix\s*=\s*[\'"](\w*)[\'"]', args)
+            qualifier = f"{alias_match.group(1)}." if alias_match else ""
+            prefix = prefix_match.group(1) if prefix_match else ""
+            suffix = suffix_match.group(1) if suffix_match else ""
+
+            columns = self.column_index.get(relation_name) if self.column_index else None
+            if not columns:
+                return self._star_fallback(
+                    relation_name, qualifier, excluded,
+                    f"Columns of '{relation_name}' are unknown, so dbt_utils.star() was converted to SELECT *."
+                )
+            if not self.column_index.is_resolved(relation_name):
+                # schema.yml (and the manifest built from it) may document only some of the columns
+                return self._star_fallback(
+                    relation_name, qualifier, excluded,
+                    f"Columns of '{relation_name}' are only documented in YAML or manifest.json, "
+                    "which may not cover every column, "
+                    "so dbt_utils.star() could not be resolved and was converted to SELECT *."
+                )
+
+            excluded_lower = {column.lower() for column in excluded}
+            selected = []
+            for column in columns:
+                if column.lower() in excluded_lower:
+                    continue
+                if prefix or suffix:
+                    selected.append(f"{qualifier}{column} AS {prefix}{column}{suffix}")
+                else:
+                    selected.append(f"{qualifier}{column}")
+            if not selected:
+                return self._star_fallback(
+                    relation_name, qualifier, excluded,
+                    f"Every known column of '{relation_name}' is excluded, so dbt_utils.star() was converted to SELECT *."
+                )
+            return ",\n  ".join(selected)
+
+        pattern = r'{{\s*(?:dbt_utils|dbt)\.star\((.*?)\)\s*}}'
+        return re.sub(pattern, replace_star, content, flags=re.DOTALL)
+
+    def _star_fallback(self, relation_name: str, qualifier: str, excluded: list, reason: str) -> str:
+        self._add_issue(
+            "Unexpanded Star",
+            f"{reason} Run `dbt docs generate` so target/catalog.json lists the columns of '{relation_name}'."
+        )
+        if excluded:
+            return f"{qualifier}* EXCEPT ({', '.join(excluded)})"
+        return f"{qualifier}*"
 
     def _convert_dbt_utils_surrogate_key(self, content: str) -> str:
         def replace_surrogate_key(match):
@@ -283,6 +640,9 @@ class ModelConverter:
         # Convert dbt_utils.group_by
         content = self._convert_dbt_utils_group_by(content)
         
+        # Convert calls to converted package macros
+        content = self._convert_package_calls(content)
+
             # Convert source calls
         content = re.sub(
             r'\{\{\s*source\([\'"](\w+)[\'"]\s*,\s*[\'"](\w+)[\'"]\)\s*\}\}',
@@ -300,6 +660,20 @@ class ModelConverter:
         #        )
         return content
 
+    def _convert_package_calls(self, content: str) -> str:
+        def replace_call(match):
+            package, function, args = match.groups()
+            if function not in self.package_functions.get(package, []):
+                return match.group(0)
+            # Keyword arguments aren't valid JavaScript, so leave those calls for manual review
+            if re.search(r'\b\w+\s*=(?!=)', re.sub(r'([\'"]).*?\1', '', args)):
+                return match.group(0)
+            return f"${{{package}.{function}({args})}}"
+
+        if not self.package_functions:
+            return content
+        return re.sub(r'\{\{\s*(\w+)\.(\w+)\((.*?)\)\s*\}\}', replace_call, content, flags=re.DOTALL)
+
     def _convert_comments(self, content: str) -> str:
         # Convert Jinja comments to JavaScript comments
         content = re.sub(r'\{#(.*?)#\}', r'/*\1*/', content, flags=re.DOTALL)
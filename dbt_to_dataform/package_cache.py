@@ -0,0 +1,131 @@
+# package_cache.py
+
+import hashlib
+import json
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dbt_to_dataform.cache import user_cache_dir
+from dbt_to_dataform.yaml_cache import load_yaml
+
+
+class PackageCache:
+    """User-level cache of converted dbt packages, keyed by package name and version.
+
+    A package's own dbt_project.yml version is often stale, so the version is
+    the one resolved in package-lock.yml or pinned in packages.yml, suffixed
+    with a hash of the package's macro sources (e.g. `1.1.1+3f2a9c0d1e4b`).
+
+    Each entry holds the package's macros converted to a single Dataform include
+    (`<package>.js`) plus the list of functions it exports, so a package version
+    is converted once per machine and reused by every project that installs it.
+    """
+
+    # (name, version) -> lock held while that package is converted, shared by every
+    # PackageCache so concurrent projects (e.g. in batch mode) convert a package once
+    _conversion_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _conversion_locks_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Path = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else user_cache_dir('packages')
+
+    def find_packages(self, dbt_project_path: Path) -> List[Tuple[str, str, Path]]:
+        """Return (name, version, path) for every package installed in the project."""
+        declared_versions = self._declared_versions(dbt_project_path)
+        packages = []
+        for packages_dir_name in ('dbt_packages', 'dbt_modules'):
+            packages_dir = Path(dbt_project_path) / packages_dir_name
+            if not packages_dir.exists():
+                continue
+            for project_file in sorted(packages_dir.glob('*/dbt_project.yml')):
+                try:
+                    package_config = load_yaml(project_file) or {}
+                except Exception as e:
+                    print(f"Error reading package config {project_file}: {str(e)}")
+                    continue
+                name = package_config.get('name', project_file.parent.name)
+                version = declared_versions.get(name, declared_versions.get(project_file.parent.name))
+                if version is None:
+                    version = str(package_config.get('version', 'unknown'))
+                version = f"{version}+{self._source_hash(project_file.parent)}"
+                packages.append((name, version, project_file.parent))
+        return packages
+
+    def _declared_versions(self, dbt_project_path: Path) -> Dict[str, str]:
+        """Return package name -> version resolved in package-lock.yml, or pinned in packages.yml."""
+        versions = {}
+        # The lock file wins, so it is read last
+        for file_name in ('packages.yml', 'dependencies.yml', 'package-lock.yml'):
+            path = Path(dbt_project_path) / file_name
+            if not path.exists():
+                continue
+            try:
+                packages = (load_yaml(path) or {}).get('packages') or []
+            except Exception as e:
+                print(f"Error reading {path}: {str(e)}")
+                continue
+            for package in packages:
+                if not isinstance(package, dict):
+                    continue
+                if 'package' in package:
+                    name, version = package['package'].split('/')[-1], package.get('version')
+                elif 'git' in package:
+                    name, version = package.get('name') or Path(package['git']).stem, package.get('revision')
+                else:
+                    continue
+                # Version ranges don't identify what is installed
+                if isinstance(version, (str, int, float)):
+                    versions[name] = str(version)
+        return versions
+
+    def _source_hash(self, package_path: Path) -> str:
+        digest = hashlib.sha256()
+        for macro_file in sorted((package_path / 'macros').rglob('*.sql')):
+            digest.update(macro_file.relative_to(package_path).as_posix().encode('utf-8') + b'\0')
+            digest.update(macro_file.read_bytes() + b'\0')
+        return digest.hexdigest()[:12]
+
+    def _entry_dir(self, name: str, version: str) -> Path:
+        return self.cache_dir / name / re.sub(r'[^\w.\-]', '_', version)
+
+    def conversion_lock(self, name: str, version: str) -> threading.Lock:
+        """Return the lock to hold while checking for and converting a package version."""
+        with self._conversion_locks_lock:
+            return self._conversion_locks.setdefault((name, version), threading.Lock())
+
+    def get(self, name: str, version: str) -> Optional[List[str]]:
+        """Return the functions exported by a cached package, or None on a cache miss."""
+        manifest_path = self._entry_dir(name, version) / 'manifest.json'
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, 'r') as f:
+            return json.load(f)['functions']
+
+    def put(self, name: str, version: str, js_content: str, functions: List[str]):
+        entry_dir = self._entry_dir(name, version)
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        (entry_dir / f"{name}.js").write_text(js_content)
+        # Written last, so an interrupted conversion is never seen as a hit
+        with open(entry_dir / 'manifest.json', 'w') as f:
+            json.dump({"name": name, "version": version, "functions": functions}, f, indent=2)
+
+    def install(self, name: str, version: str, includes_dir: Path) -> bool:
+        """Copy a cached package include into a Dataform project's includes directory."""
+        if self.get(name, version) is None:
+            return False
+        includes_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy(self._entry_dir(name, version) / f"{name}.js", includes_dir / f"{name}.js")
+        return True
+
+    def install_cached_packages(self, dbt_project_path: Path, dataform_output_path: Path) -> Dict[str, List[str]]:
+        """Install every cached package used by the project, returning package name -> functions."""
+        package_functions = {}
+        includes_dir = Path(dataform_output_path) / 'includes'
+        for name, version, _ in self.find_packages(dbt_project_path):
+            if self.install(name, version, includes_dir):
+                package_functions[name] = self.get(name, version)
+                print(f"Using cached conversion of package {name} {version}")
+        return package_functions
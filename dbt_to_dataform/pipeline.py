@@ -0,0 +1,128 @@
+# pipeline.py
+
+import queue
+import threading
+import traceback
+from typing import Callable, Iterable, Iterator
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Pipeline:
+    """Streams items through a chain of stages connected by bounded queues.
+
+    Each stage runs in its own thread(s) and starts on the first item as soon
+    as it arrives, so reading, converting, checking and writing overlap. A full
+    queue blocks the stage feeding it, which keeps the number of items in
+    flight, and so memory, bounded however large the input is.
+
+    A stage is either a map stage, `func(item)` run by `workers` threads and
+    returning the next item (or None to drop it), or a stream stage,
+    `func(iterator)` yielding the next items, for consumers such as
+    IsolatedExecutor.imap_unordered that manage their own concurrency.
+    """
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._stages = []
+        self.errors = []
+
+    def add_stage(self, name: str, func: Callable, workers: int = 1) -> 'Pipeline':
+        self._stages.append((name, func, max(1, workers), False))
+        return self
+
+    def add_stream_stage(self, name: str, func: Callable[[Iterator], Iterable]) -> 'Pipeline':
+        self._stages.append((name, func, 1, True))
+        return self
+
+    def run(self, source: Iterable) -> list:
+        """Run every item from source through the stages and return the final stage's outputs.
+
+        Outputs that are None are dropped, so a final stage that only writes
+        returns an empty list.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self._stages) + 1)]
+        threads = [threading.Thread(target=self._produce, args=(source, queues[0]), daemon=True)]
+
+        for index, (name, func, workers, stream) in enumerate(self._stages):
+            inbox, outbox = queues[index], queues[index + 1]
+            if stream:
+                threads.append(threading.Thread(target=self._run_stream, args=(name, func, inbox, outbox), daemon=True))
+            else:
+                remaining = [workers]
+                lock = threading.Lock()
+                for _ in range(workers):
+                    threads.append(threading.Thread(target=self._run_map,
+                                                    args=(name, func, inbox, outbox, remaining, lock), daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            results.append(item)
+
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _produce(self, source: Iterable, outbox: queue.Queue):
+        try:
+            for item in source:
+                outbox.put(item)
+        except Exception as e:
+            self._record_error('source', e)
+        finally:
+            outbox.put(_DONE)
+
+    def _drain(self, inbox: queue.Queue) -> Iterator:
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            yield item
+
+    def _run_map(self, name: str, func: Callable, inbox: queue.Queue, outbox: queue.Queue,
+                 remaining: list, lock: threading.Lock):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Let the stage's other workers see the end of the input too
+                inbox.put(_DONE)
+                break
+            try:
+                result = func(item)
+            except Exception as e:
+                self._record_error(name, e)
+                continue
+            if result is not None:
+                outbox.put(result)
+
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            outbox.put(_DONE)
+
+    def _run_stream(self, name: str, func: Callable, inbox: queue.Queue, outbox: queue.Queue):
+        items = self._drain(inbox)
+        try:
+            for result in func(items):
+                if result is not None:
+                    outbox.put(result)
+        except Exception as e:
+            self._record_error(name, e)
+            # Keep consuming so the stages upstream can finish
+            for _ in items:
+                pass
+        finally:
+            outbox.put(_DONE)
+
+    def _record_error(self, name: str, error: Exception):
+        print(f"Error in {name} stage: {str(error)}")
+        traceback.print_exc()
+        self.errors.append((name, error))
@@ -10,6 +10,8 @@ import yaml
 import json
 from pathlib import Path
 
+from dbt_to_dataform.yaml_cache import load_yaml
+
 class ProjectConfigConverter:
     def __init__(self, dbt_project_path: Path, dataform_config_path: Path):
         self.dbt_project_path = dbt_project_path
@@ -24,8 +26,7 @@ class ProjectConfigConverter:
         return value
 
     def convert(self):
-        with open(self.dbt_project_path, 'r') as f:
-            dbt_config = yaml.safe_load(f)
+        dbt_config = load_yaml(self.dbt_project_path)
 
         default_location = self._get_default_location(dbt_config)
 
@@ -11,6 +11,9 @@ class ProjectGenerator:
     def generate_project_structure(self):
         directories = [
             'definitions/sources',
+            'definitions/seeds',
+            'definitions/snapshots',
+            'definitions/assertions',
             'definitions/intermediate',
             'definitions/output',
             'includes'
@@ -1,8 +1,11 @@
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 class RepositoryAnalyzer:
+    # Directories that never contain the user's own dbt projects
+    SKIPPED_DIRS = {'dbt_packages', 'dbt_modules', 'target', 'logs', 'node_modules', '.git', '.venv', 'venv'}
+
     def __init__(self, repo_path: str):
         self.repo_path = Path(repo_path)
         self.dbt_project_path = self._find_dbt_project()
@@ -14,6 +17,16 @@ class RepositoryAnalyzer:
                 return Path(root)
         raise FileNotFoundError("No dbt_project.yml found in the repository.")
 
+    @classmethod
+    def find_dbt_projects(cls, repo_path: str) -> List[Path]:
+        """Find every dbt project in a (mono)repository in a single walk."""
+        projects = []
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = sorted(d for d in dirs if d not in cls.SKIPPED_DIRS)
+            if 'dbt_project.yml' in files:
+                projects.append(Path(root))
+        return projects
+
     def analyze(self) -> Dict[str, List[Path]]:
         """Analyze the dbt project structure and return a dictionary of artifacts."""
         artifacts = {
@@ -25,23 +38,30 @@ class RepositoryAnalyzer:
             'snapshots': [],
         }
         for artifact_type in artifacts:
-            artifact_dir = self.dbt_project_path / artifact_type
-            if artifact_dir.exists():
-                if artifact_type == 'seeds':
-                    artifacts[artifact_type] = list(artifact_dir.glob('*.csv'))
-                else:
-                    artifacts[artifact_type] = list(artifact_dir.rglob('*.sql'))
+            artifacts[artifact_type] = list(self.iter_artifacts(artifact_type))
         
         # Add YAML files
-        artifacts['yaml_files'] = list(self.dbt_project_path.rglob('*.yml'))
+        artifacts['yaml_files'] = list(self.iter_artifacts('yaml_files'))
         
         return artifacts
 
+    def iter_artifacts(self, artifact_type: str) -> Iterator[Path]:
+        """Lazily yield the files of one artifact type, as listed by analyze()."""
+        if artifact_type == 'yaml_files':
+            yield from self.dbt_project_path.rglob('*.yml')
+            return
+        artifact_dir = self.dbt_project_path / artifact_type
+        if not artifact_dir.exists():
+            return
+        if artifact_type == 'seeds':
+            yield from artifact_dir.glob('*.csv')
+        else:
+            yield from artifact_dir.rglob('*.sql')
+
     def get_project_config(self) -> Dict:
         """Read and return the dbt_project.yml configuration."""
-        import yaml
-        with open(self.dbt_project_path / 'dbt_project.yml', 'r') as f:
-            return yaml.safe_load(f)
+        from dbt_to_dataform.yaml_cache import load_yaml
+        return load_yaml(self.dbt_project_path / 'dbt_project.yml')
 
     def get_seed_files(self) -> List[Path]:
         """Get all seed files from the seeds directory."""
@@ -0,0 +1,234 @@
+# seed_converter.py
+
+import csv
+import re
+from pathlib import Path
+
+from dbt_to_dataform.conversion_report import ConversionReport
+from dbt_to_dataform.yaml_cache import load_yaml
+
+
+class SeedConverter:
+    """Converts dbt seed CSV files into Dataform table definitions.
+
+    CSV files are streamed row by row, so a seed never has to fit in memory.
+    Column types are inferred from every row in a first pass, so no value is
+    lost to a type only the later rows contradict. Seeds whose
+    generated SQL would exceed `chunk_bytes` are split into several part tables
+    unioned by a view, and seeds larger than `external_threshold_bytes` are
+    declared instead, to be loaded with `bq load`.
+    """
+
+    TYPE_PATTERNS = [
+        ('BOOL', re.compile(r'^(true|false)$', re.IGNORECASE)),
+        ('INT64', re.compile(r'^[-+]?\d+$')),
+        ('FLOAT64', re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')),
+        ('DATE', re.compile(r'^\d{4}-\d{2}-\d{2}$')),
+        ('TIMESTAMP', re.compile(r'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[-+]\d{2}:?\d{2}| UTC)?$')),
+    ]
+
+    def __init__(self, dbt_project_path: Path, dataform_output_path: Path,
+                 chunk_bytes: int = 512 * 1024, external_threshold_bytes: int = 50 * 1024 * 1024):
+        self.dbt_project_path = Path(dbt_project_path)
+        self.dataform_output_path = Path(dataform_output_path)
+        self.chunk_bytes = chunk_bytes
+        self.external_threshold_bytes = external_threshold_bytes
+        self.seeds_config = self._load_seeds_config()
+
+    def _load_seeds_config(self) -> dict:
+        try:
+            return (load_yaml(self.dbt_project_path / 'dbt_project.yml') or {}).get('seeds', {}) or {}
+        except Exception as e:
+            print(f"Error loading seeds config from dbt_project.yml: {str(e)}")
+            return {}
+
+    def convert_seeds(self, seed_files, conversion_report: ConversionReport = None) -> set:
+        seeds_dir = self.dataform_output_path / 'definitions' / 'seeds'
+        seeds_dir.mkdir(parents=True, exist_ok=True)
+        seed_names = set()
+
+        for seed_file in seed_files:
+            try:
+                self.convert_seed(Path(seed_file), seeds_dir, conversion_report)
+                seed_names.add(Path(seed_file).stem)
+            except Exception as e:
+                print(f"Error converting seed {seed_file}: {str(e)}")
+                if conversion_report:
+                    conversion_report.add_issue(
+                        str(seed_file),
+                        "Seed Conversion Error",
+                        f"Error occurred during seed conversion: {str(e)}"
+                    )
+
+        return seed_names
+
+    def convert_seed(self, seed_file: Path, seeds_dir: Path, conversion_report: ConversionReport = None):
+        seed_name = seed_file.stem
+        seed_config = self._get_seed_config(seed_name)
+
+        with open(seed_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                print(f"Skipping empty seed file: {seed_file}")
+                return
+            column_types = self._infer_column_types(header, reader)
+
+        column_types.update({k: str(v).upper() for k, v in seed_config.get('column_types', {}).items() if k in column_types})
+
+        if seed_file.stat().st_size > self.external_threshold_bytes:
+            self._write_external_declaration(seed_file, seed_name, seed_config, column_types, seeds_dir, conversion_report)
+            return
+
+        mismatches = self._write_chunks(seed_file, seed_name, seed_config, column_types, seeds_dir)
+
+        if mismatches and conversion_report:
+            details = ", ".join(f"{column} ({count} values)" for column, count in mismatches.items())
+            conversion_report.add_issue(
+                str(seed_file),
+                "Seed Type Mismatch",
+                f"Some values don't match the column_types configured for this seed "
+                f"and were written as NULL: {details}."
+            )
+
+    def _get_seed_config(self, seed_name: str) -> dict:
+        """Find seed-specific config (column_types, schema) in the dbt_project.yml seeds block."""
+        def find(node):
+            if not isinstance(node, dict):
+                return None
+            if isinstance(node.get(seed_name), dict):
+                return node[seed_name]
+            for value in node.values():
+                found = find(value)
+                if found is not None:
+                    return found
+            return None
+
+        config = find(self.seeds_config) or {}
+        return {k.lstrip('+'): v for k, v in config.items()}
+
+    def _infer_column_types(self, header: list, rows) -> dict:
+        """Stream the rows, narrowing each column to the types all of its values match."""
+        candidates = [list(self.TYPE_PATTERNS) for _ in header]
+        seen = [False] * len(header)
+        for row in rows:
+            for index, value in enumerate(row[:len(header)]):
+                if value == '' or not candidates[index]:
+                    continue
+                seen[index] = True
+                candidates[index] = [(type_name, pattern) for type_name, pattern in candidates[index]
+                                     if pattern.match(value)]
+
+        # The first remaining type in TYPE_PATTERNS order is the narrowest
+        return {column: candidates[index][0][0] if seen[index] and candidates[index] else 'STRING'
+                for index, column in enumerate(header)}
+
+    def _matches_type(self, value: str, column_type: str) -> bool:
+        for type_name, pattern in self.TYPE_PATTERNS:
+            if type_name == column_type:
+                return bool(pattern.match(value))
+        return True
+
+    def _format_value(self, value: str, column_type: str) -> str:
+        if value == '' or not self._matches_type(value, column_type):
+            return 'NULL'
+        if column_type in ('INT64', 'FLOAT64'):
+            return value
+        if column_type == 'BOOL':
+            return value.lower()
+        literal = "'" + value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r') + "'"
+        if column_type == 'STRING':
+            return literal
+        if column_type in ('DATE', 'TIMESTAMP'):
+            return f"{column_type} {literal}"
+        return f"SAFE_CAST({literal} AS {column_type})"
+
+    def _struct_type(self, column_types: dict) -> str:
+        return ", ".join(f"`{column}` {column_type}" for column, column_type in column_types.items())
+
+    def _config_block(self, seed_name: str, table_type: str, seed_config: dict, extra: str = "") -> str:
+        items = [f"  type: \"{table_type}\"", f"  name: \"{seed_name}\""]
+        if seed_config.get('schema'):
+            items.append(f"  schema: \"{seed_config['schema']}\"")
+        items.append("  tags: [\"seed\"]")
+        if extra:
+            items.append(extra)
+        return "config {\n" + ",\n".join(items) + "\n}"
+
+    def _write_chunks(self, seed_file: Path, seed_name: str, seed_config: dict, column_types: dict, seeds_dir: Path) -> dict:
+        """Stream the CSV into part files of at most chunk_bytes of SQL each."""
+        columns = list(column_types.keys())
+        struct_type = self._struct_type(column_types)
+        mismatches = {}
+        parts = []
+        rows = []
+        size = 0
+
+        def flush():
+            part_name = f"{seed_name}__part_{len(parts) + 1:03d}"
+            parts.append(part_name)
+            self._write_part(seeds_dir / f"{part_name}.sqlx", part_name, seed_config, struct_type, rows)
+
+        with open(seed_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                values = []
+                for index, column in enumerate(columns):
+                    value = row[index] if index < len(row) else ''
+                    if value != '' and not self._matches_type(value, column_types[column]):
+                        mismatches[column] = mismatches.get(column, 0) + 1
+                    values.append(self._format_value(value, column_types[column]))
+                row_sql = "STRUCT(" + ", ".join(values) + ")"
+                if rows and size + len(row_sql) > self.chunk_bytes:
+                    flush()
+                    rows = []
+                    size = 0
+                rows.append(row_sql)
+                size += len(row_sql) + 2
+
+        if not parts:
+            # Small seed: a single table holds all rows
+            self._write_part(seeds_dir / f"{seed_name}.sqlx", seed_name, seed_config, struct_type, rows, is_part=False)
+            print(f"Converted seed {seed_file.name} to {seed_name}.sqlx")
+            return mismatches
+
+        if rows:
+            flush()
+
+        union_sql = "\nUNION ALL\n".join(f"SELECT * FROM ${{ref('{part}')}}" for part in parts)
+        content = f"{self._config_block(seed_name, 'view', seed_config)}\n\n{union_sql}\n"
+        (seeds_dir / f"{seed_name}.sqlx").write_text(content)
+        print(f"Converted seed {seed_file.name} to {seed_name}.sqlx ({len(parts)} parts)")
+        return mismatches
+
+    def _write_part(self, path: Path, name: str, seed_config: dict, struct_type: str, rows: list, is_part: bool = True):
+        extra = "  description: \"Part of a chunked seed, do not reference directly\"" if is_part else ""
+        with open(path, 'w') as f:
+            f.write(self._config_block(name, 'table', seed_config, extra))
+            f.write(f"\n\nSELECT *\nFROM UNNEST(ARRAY<STRUCT<{struct_type}>>[\n  ")
+            f.write(",\n  ".join(rows))
+            f.write("\n])\n")
+
+    def _write_external_declaration(self, seed_file: Path, seed_name: str, seed_config: dict, column_types: dict,
+                                    seeds_dir: Path, conversion_report: ConversionReport = None):
+        schema = seed_config.get('schema', 'dataform')
+        content = (
+            "config {\n"
+            "  type: \"declaration\",\n"
+            f"  schema: \"{schema}\",\n"
+            f"  name: \"{seed_name}\"\n"
+            "}\n"
+        )
+        (seeds_dir / f"{seed_name}.sqlx").write_text(content)
+
+        bq_schema = ",".join(f"{column}:{column_type}" for column, column_type in column_types.items())
+        load_command = f"bq load --source_format=CSV --skip_leading_rows=1 {schema}.{seed_name} {seed_file} {bq_schema}"
+        print(f"Seed {seed_file.name} is too large to inline, declared {seed_name} for external loading")
+        if conversion_report:
+            conversion_report.add_issue(
+                str(seed_file),
+                "Seed Requires External Load",
+                f"Seed exceeds {self.external_threshold_bytes} bytes and was declared rather than inlined. "
+                f"Load it with: {load_command}"
+            )
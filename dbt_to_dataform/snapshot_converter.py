@@ -0,0 +1,211 @@
+# snapshot_converter.py
+
+import re
+from pathlib import Path
+
+from dbt_to_dataform.conversion_report import ConversionReport
+from dbt_to_dataform.model_converter import ModelConverter
+
+SCD_COLUMNS = ['dbt_scd_id', 'dbt_updated_at', 'dbt_valid_from', 'dbt_valid_to']
+
+
+class SnapshotConverter:
+    """Converts dbt snapshots into Dataform incremental tables with SCD2 columns.
+
+    The target is partitioned on DATE(dbt_valid_to), so all current rows live in
+    the NULL partition. Incremental runs only read that partition of the target,
+    and the MERGE is restricted to it with updatePartitionFilter. Only keys whose
+    row changed are emitted: a new version for each, plus an update closing the
+    version it supersedes. Closed history is never scanned.
+    """
+
+    def __init__(self, model_converter: ModelConverter, dataform_output_path: Path):
+        self.model_converter = model_converter
+        self.dataform_output_path = Path(dataform_output_path)
+
+    def convert_snapshots(self, snapshot_files, conversion_report: ConversionReport = None) -> set:
+        snapshots_dir = self.dataform_output_path / 'definitions' / 'snapshots'
+        snapshots_dir.mkdir(parents=True, exist_ok=True)
+        snapshot_names = set()
+
+        for snapshot_file in snapshot_files:
+            try:
+                with open(snapshot_file, 'r') as f:
+                    content = f.read()
+
+                blocks = re.findall(
+                    r'{%-?\s*snapshot\s+(\w+)\s*-?%}(.*?){%-?\s*endsnapshot\s*-?%}',
+                    content,
+                    re.DOTALL
+                )
+                if not blocks:
+                    print(f"No snapshot block found in {snapshot_file}")
+                    continue
+
+                for name, body in blocks:
+                    sqlx_content = self.convert_snapshot(name, body, str(snapshot_file), conversion_report)
+                    output_file = snapshots_dir / f"{name}.sqlx"
+                    output_file.write_text(sqlx_content)
+                    snapshot_names.add(name)
+                    print(f"Converted snapshot {name} to {output_file}")
+            except Exception as e:
+                print(f"Error converting snapshot {snapshot_file}: {str(e)}")
+                if conversion_report:
+                    conversion_report.add_issue(
+                        str(snapshot_file),
+                        "Snapshot Conversion Error",
+                        f"Error occurred during snapshot conversion: {str(e)}"
+                    )
+
+        return snapshot_names
+
+    def convert_snapshot(self, name: str, body: str, file_path: str, conversion_report: ConversionReport = None) -> str:
+        config_match = re.search(r'\{\{\s*config\((.*?)\)\s*\}\}', body, re.DOTALL)
+        if not config_match:
+            raise ValueError(f"Snapshot {name} has no config() block")
+        config = self.model_converter._parse_config_args(config_match.group(1))
+
+        unique_key = config.get('unique_key')
+        strategy = config.get('strategy')
+        if not unique_key:
+            raise ValueError(f"Snapshot {name} has no unique_key")
+        if strategy not in ('timestamp', 'check'):
+            raise ValueError(f"Snapshot {name} has unsupported strategy: {strategy}")
+        if strategy == 'timestamp' and not config.get('updated_at'):
+            raise ValueError(f"Snapshot {name} uses the timestamp strategy without updated_at")
+        if strategy == 'check' and not config.get('check_cols'):
+            raise ValueError(f"Snapshot {name} uses the check strategy without check_cols")
+
+        if config.get('invalidate_hard_deletes') and conversion_report:
+            conversion_report.add_issue(
+                file_path,
+                "Unsupported Snapshot Option",
+                f"Snapshot {name} sets invalidate_hard_deletes, which is not converted. "
+                "Rows deleted from the source stay current in the snapshot."
+            )
+
+        # Issues found converting the source query (e.g. an unexpanded star) belong to the snapshot
+        self.model_converter.issues = []
+        source_sql = self.model_converter._convert_sql(body)
+        if conversion_report:
+            for issue in self.model_converter.issues:
+                conversion_report.add_issue(file_path, issue['type'], issue['description'])
+        return f"{self._config_block(config)}\n\n{self._snapshot_sql(source_sql, config)}\n"
+
+    def _key_columns(self, unique_key) -> list:
+        return unique_key if isinstance(unique_key, list) else [unique_key]
+
+    def _key_expression(self, unique_key, alias: str = "") -> str:
+        def qualify(column):
+            # Only plain column names are qualified; expressions are used as-is
+            return f"{alias}.{column}" if alias and re.match(r'^\w+$', str(column)) else str(column)
+
+        columns = self._key_columns(unique_key)
+        if len(columns) == 1:
+            return f"CAST({qualify(columns[0])} AS STRING)"
+        return "CONCAT(" + ", '|', ".join(f"COALESCE(CAST({qualify(c)} AS STRING), '')" for c in columns) + ")"
+
+    def _check_hash(self, check_cols, alias: str, exclude_scd_columns: bool) -> str:
+        if check_cols == 'all':
+            if exclude_scd_columns:
+                row = f"(SELECT AS STRUCT {alias}.* EXCEPT({', '.join(SCD_COLUMNS)}))"
+            else:
+                row = alias
+        else:
+            row = "STRUCT(" + ", ".join(f"{alias}.{column}" for column in check_cols) + ")"
+        return f"TO_HEX(MD5(TO_JSON_STRING({row})))"
+
+    def _config_block(self, config: dict) -> str:
+        items = ["  type: \"incremental\""]
+        if config.get('target_database'):
+            items.append(f"  database: \"{config['target_database']}\"")
+        if config.get('target_schema'):
+            items.append(f"  schema: \"{config['target_schema']}\"")
+        items.append("  uniqueKey: [\"dbt_scd_id\"]")
+
+        cluster_by = ", ".join(f"\"{column}\"" for column in self._key_columns(config['unique_key'])
+                               if re.match(r'^\w+$', str(column)))
+        bigquery_items = [
+            "    partitionBy: \"DATE(dbt_valid_to)\"",
+            "    updatePartitionFilter: \"dbt_valid_to IS NULL\""
+        ]
+        if cluster_by:
+            bigquery_items.append(f"    clusterBy: [{cluster_by}]")
+        items.append("  bigquery: {\n" + ",\n".join(bigquery_items) + "\n  }")
+        items.append("  tags: [\"snapshot\"]")
+        return "config {\n" + ",\n".join(items) + "\n}"
+
+    def _snapshot_sql(self, source_sql: str, config: dict) -> str:
+        unique_key = config['unique_key']
+        is_check = config['strategy'] == 'check'
+
+        if is_check:
+            updated_at = "CURRENT_TIMESTAMP()"
+            change_condition = "s.dbt_check_hash != c.dbt_check_hash"
+        else:
+            updated_at = f"CAST(source_data.{config['updated_at']} AS TIMESTAMP)"
+            change_condition = "s.dbt_updated_at > c.dbt_updated_at"
+
+        source_columns = [
+            "    source_data.*",
+            f"    {self._key_expression(unique_key, 'source_data')} AS dbt_unique_key",
+            f"    {updated_at} AS dbt_updated_at"
+        ]
+        current_columns = [
+            "      t.dbt_scd_id",
+            "      t.dbt_updated_at",
+            f"      {self._key_expression(unique_key, 't')} AS dbt_unique_key"
+        ]
+        helper_columns = ["dbt_unique_key"]
+        if is_check:
+            source_columns.append(f"    {self._check_hash(config['check_cols'], 'source_data', False)} AS dbt_check_hash")
+            current_columns.append(f"      {self._check_hash(config['check_cols'], 't', True)} AS dbt_check_hash")
+            helper_columns.append("dbt_check_hash")
+
+        new_version_columns = (
+            "TO_HEX(MD5(CONCAT(dbt_unique_key, '|', CAST(dbt_updated_at AS STRING)))) AS dbt_scd_id,\n"
+            "  dbt_updated_at AS dbt_valid_from,\n"
+            "  CAST(NULL AS TIMESTAMP) AS dbt_valid_to"
+        )
+        indented_source = "\n".join(f"  {line}" if line else line for line in source_sql.splitlines())
+
+        full_refresh = (
+            f"SELECT\n"
+            f"  * EXCEPT({', '.join(helper_columns)}),\n"
+            f"  {new_version_columns}\n"
+            f"FROM snapshot_source"
+        )
+        incremental = (
+            ", current_rows AS (\n"
+            "    -- Current versions all live in the NULL dbt_valid_to partition\n"
+            "    SELECT\n" + ",\n".join(current_columns) + "\n"
+            f"    FROM ${{self()}} AS t\n"
+            f"    WHERE t.dbt_valid_to IS NULL\n"
+            f"),\n\n"
+            f"changed AS (\n"
+            f"    SELECT s.*, c.dbt_scd_id AS dbt_current_scd_id\n"
+            f"    FROM snapshot_source AS s\n"
+            f"    LEFT JOIN current_rows AS c ON s.dbt_unique_key = c.dbt_unique_key\n"
+            f"    WHERE c.dbt_unique_key IS NULL OR {change_condition}\n"
+            f")\n\n"
+            f"-- New versions of changed keys\n"
+            f"SELECT\n"
+            f"  * EXCEPT({', '.join(helper_columns + ['dbt_current_scd_id'])}),\n"
+            f"  {new_version_columns}\n"
+            f"FROM changed\n\n"
+            f"UNION ALL\n\n"
+            f"-- Close the versions they supersede\n"
+            f"SELECT t.* REPLACE (changed.dbt_updated_at AS dbt_valid_to)\n"
+            f"FROM ${{self()}} AS t\n"
+            f"JOIN changed ON t.dbt_scd_id = changed.dbt_current_scd_id\n"
+            f"WHERE t.dbt_valid_to IS NULL"
+        )
+
+        return (
+            f"WITH source_data AS (\n{indented_source}\n),\n\n"
+            f"snapshot_source AS (\n"
+            f"  SELECT\n" + ",\n".join(source_columns) + "\n"
+            f"  FROM source_data\n"
+            f")\n\n"
+            f"${{when(incremental(), `{incremental}`, `{full_refresh}`)}}"
+        )
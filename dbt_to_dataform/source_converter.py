@@ -1,5 +1,6 @@
 from pathlib import Path
-import yaml
+
+from dbt_to_dataform.yaml_cache import load_yaml
 
 class SourceConverter:
     def __init__(self, dbt_project_path: Path, dataform_output_path: Path):
@@ -9,8 +10,7 @@ class SourceConverter:
 
     def _load_project_config(self):
         try:
-            with open(self.dbt_project_path / 'dbt_project.yml', 'r') as f:
-                return yaml.safe_load(f)
+            return load_yaml(self.dbt_project_path / 'dbt_project.yml')
         except Exception as e:
             print(f"Error loading dbt_project.yml: {str(e)}")
             return {}
@@ -23,8 +23,7 @@ class SourceConverter:
         model_yml_files = list(self.dbt_project_path.rglob('models/**/*.yml'))
         for yml_file in model_yml_files:
             try:
-                with open(yml_file, 'r') as f:
-                    yml_content = yaml.safe_load(f)
+                yml_content = load_yaml(yml_file)
                 
                 if yml_content is None or not isinstance(yml_content, dict):
                     continue
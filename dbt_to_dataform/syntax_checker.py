@@ -3,10 +3,25 @@ import json
 import openai
 from pathlib import Path
 from dbt_to_dataform.conversion_report import ConversionReport
+from dbt_to_dataform.llm_cache import LLMResponseCache
 
 class SyntaxChecker:
-    def __init__(self, openai_api_key: str):
+    MODEL_NAME = "gpt-4"
+    SYSTEM_PROMPT = "You are an expert in Dataform syntax and SQL. Your task is to check and correct Dataform SQLX and JSON configuration files."
+
+    # Regions of converted SQLX that are likely to need repair
+    SUSPECT_PATTERNS = [
+        ("leftover Jinja", re.compile(r'\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}', re.DOTALL)),
+        ("when/otherwise block", re.compile(r'\$\{\s*(?:when|otherwise)\s*\(')),
+        ("unconverted dbt_utils", re.compile(r'\bdbt_utils\.\w+')),
+    ]
+
+    def __init__(self, openai_api_key: str, llm_cache: LLMResponseCache = None,
+                 fragment_mode: bool = False, context_lines: int = 3):
         self.openai_api_key = openai_api_key
+        self.llm_cache = llm_cache
+        self.fragment_mode = fragment_mode
+        self.context_lines = context_lines
         openai.api_key = openai_api_key
 
     def check_and_correct_syntax(self, file_path: Path, content: str, conversion_report: ConversionReport) -> tuple:
@@ -21,18 +36,13 @@ class SyntaxChecker:
             return str(content) if content is not None else "", None
 
         file_type = self._get_file_type(file_path)
+        if self.fragment_mode and file_type == 'sqlx':
+            return self._check_fragments(file_path, content, conversion_report)
+
         prompt = self._generate_prompt(file_type, content)
 
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert in Dataform syntax and SQL. Your task is to check and correct Dataform SQLX and JSON configuration files."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-
-            result = response.choices[0].message.content.strip()
+            result = self._complete(prompt)
             print(f"OpenAI response received for {file_path}")
 
             if result.lower() != "valid":
@@ -53,6 +63,161 @@ class SyntaxChecker:
             print(f"Error during syntax check for {file_path}: {str(e)}")
             return content, None
 
+    def plan_request(self, file_path: Path, content: str):
+        """Return (prompt, text the response is expected to echo) for a check, or None if nothing would be sent."""
+        file_type = self._get_file_type(file_path)
+        if self.fragment_mode and file_type == 'sqlx':
+            fragments = self.find_suspect_fragments(content)
+            if not fragments:
+                return None
+            echoed = "\n".join(content[start:end] for start, end, _ in fragments)
+            return self._generate_fragment_prompt(content, fragments), echoed
+        return self._generate_prompt(file_type, content), content
+
+    def _check_fragments(self, file_path: Path, content: str, conversion_report: ConversionReport) -> tuple:
+        """Send only the suspicious regions of the file and splice the returned patches back in."""
+        fragments = self.find_suspect_fragments(content)
+        if not fragments:
+            print(f"No suspect fragments in {file_path}, skipping syntax check")
+            return content, None
+
+        prompt = self._generate_fragment_prompt(content, fragments)
+        try:
+            result = self._complete(prompt)
+            print(f"OpenAI response received for {file_path}")
+            patches = self._extract_patches(result)
+        except Exception as e:
+            print(f"Error during syntax check for {file_path}: {str(e)}")
+            return content, None
+
+        corrected = content
+        applied = []
+        # Splice from the end of the file so earlier offsets stay valid
+        for index in sorted(patches, reverse=True):
+            if not 0 <= index < len(fragments):
+                continue
+            start, end, reasons = fragments[index]
+            replacement = patches[index]
+            if replacement == content[start:end]:
+                continue
+            corrected = corrected[:start] + replacement + corrected[end:]
+            first_line = content.count('\n', 0, start) + 1
+            last_line = first_line + content.count('\n', start, end)
+            applied.append((first_line, last_line, reasons))
+
+        if not applied:
+            print(f"No syntax corrections needed for {file_path}")
+            return content, None
+
+        for first_line, last_line, reasons in reversed(applied):
+            conversion_report.add_issue(
+                str(file_path),
+                "Syntax Correction",
+                f"Lines {first_line}-{last_line} ({', '.join(reasons)}) were corrected."
+            )
+        print(f"Syntax corrections made to {len(applied)} fragments of {file_path}")
+        return corrected, result
+
+    def find_suspect_fragments(self, content: str) -> list:
+        """Return (start, end, reasons) character spans of suspicious regions, widened to whole
+        lines plus context_lines either side, with overlapping spans merged."""
+        line_starts = [0] + [m.end() for m in re.finditer(r'\n', content)]
+        spans = []
+        for reason, pattern in self.SUSPECT_PATTERNS:
+            for match in pattern.finditer(content):
+                end = match.end()
+                if reason == "when/otherwise block":
+                    end = self._block_end(content, match.start())
+                spans.append((match.start(), end, reason))
+
+        fragments = []
+        for start, end, reason in sorted(spans):
+            first = max(self._line_index(line_starts, start) - self.context_lines, 0)
+            last = min(self._line_index(line_starts, max(end - 1, start)) + self.context_lines, len(line_starts) - 1)
+            start = line_starts[first]
+            end = line_starts[last + 1] - 1 if last + 1 < len(line_starts) else len(content)
+            if fragments and start <= fragments[-1][1]:
+                previous_start, previous_end, reasons = fragments[-1]
+                fragments[-1] = (previous_start, max(previous_end, end),
+                                 reasons if reason in reasons else reasons + [reason])
+            else:
+                fragments.append((start, end, [reason]))
+        return fragments
+
+    def _line_index(self, line_starts: list, offset: int) -> int:
+        low, high = 0, len(line_starts) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if line_starts[middle] <= offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _block_end(self, content: str, start: int) -> int:
+        # Follow the ${ ... } interpolation to its closing brace; unbalanced blocks run to the end
+        depth = 0
+        for position in range(start + 1, len(content)):
+            if content[position] == '{':
+                depth += 1
+            elif content[position] == '}':
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+        return len(content)
+
+    def _generate_fragment_prompt(self, content: str, fragments: list) -> str:
+        sections = []
+        for index, (start, end, reasons) in enumerate(fragments):
+            first_line = content.count('\n', 0, start) + 1
+            sections.append(
+                f"Fragment {index} (line {first_line}, suspected: {', '.join(reasons)}):\n"
+                f"<<<\n{content[start:end]}\n>>>"
+            )
+        fragments_text = "\n\n".join(sections)
+        return f"""
+            The following fragments were taken from a Dataform SQLX file converted from dbt. They may contain
+            leftover Jinja, malformed when()/otherwise() blocks or unconverted dbt_utils calls.
+
+            For every fragment that is not valid Dataform SQLX, return the full corrected fragment, including
+            its unchanged lines. Leave out fragments that are already valid.
+            Respond only with a JSON object mapping fragment numbers to corrected fragments, wrapped in ```json and ``` tags,
+            for example {{"0": "corrected fragment text"}}. Respond with {{}} if every fragment is valid.
+
+            {fragments_text}
+            """
+
+    def _extract_patches(self, result: str) -> dict:
+        json_blocks = re.findall(r'```(?:json)?(.*?)```', result, re.DOTALL)
+        text = json_blocks[-1] if json_blocks else result[result.find('{'):result.rfind('}') + 1]
+        try:
+            patches = json.loads(text.strip() or '{}')
+        except json.JSONDecodeError:
+            print("Warning: Could not parse fragment corrections.")
+            return {}
+        if not isinstance(patches, dict):
+            return {}
+        return {int(k): v for k, v in patches.items() if str(k).isdigit() and isinstance(v, str)}
+
+    def _complete(self, prompt: str) -> str:
+        if self.llm_cache:
+            cached = self.llm_cache.get(self.MODEL_NAME, prompt)
+            if cached is not None:
+                return cached
+
+        response = openai.ChatCompletion.create(
+            model=self.MODEL_NAME,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        result = response.choices[0].message.content.strip()
+
+        if self.llm_cache:
+            self.llm_cache.put(self.MODEL_NAME, prompt, result)
+        return result
+
     def _get_file_type(self, file_path: Path) -> str:
         if file_path.suffix == '.sqlx':
             return 'sqlx'
@@ -0,0 +1,23 @@
+# unit_converter.py
+
+from dbt_to_dataform.metadata_converter import MetadataConverter
+from dbt_to_dataform.model_converter import ModelConverter
+
+
+class UnitConverter:
+    """Converts one discovered file in a worker process: a model or a schema.yml.
+
+    Workers receive it once and keep it for every unit they convert, so the
+    model converter's column index and Jinja environment are set up once per
+    worker rather than once per file.
+    """
+
+    def __init__(self, model_converter: ModelConverter, metadata_converter: MetadataConverter):
+        self.model_converter = model_converter
+        self.metadata_converter = metadata_converter
+
+    def __call__(self, unit):
+        kind, path = unit
+        if kind == 'model':
+            return self.model_converter.convert_model_collecting_issues(path)
+        return self.metadata_converter.convert_schema_yml(path)
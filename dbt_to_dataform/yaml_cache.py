@@ -0,0 +1,30 @@
+# yaml_cache.py
+
+import threading
+from pathlib import Path
+import yaml
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def load_yaml(path):
+    """Parse a YAML file once per process and return the cached result.
+
+    Entries are keyed by path, modification time and size, so edited files are
+    re-read. The same object is returned to every caller: treat it as read-only.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    with open(path, 'r') as f:
+        content = yaml.safe_load(f)
+
+    with _lock:
+        _cache[key] = content
+    return content
@@ -6,29 +6,50 @@ import yaml
 import traceback
 import sys
 import shutil
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 from dbt_to_dataform.repository_analyzer import RepositoryAnalyzer
 from dbt_to_dataform.model_converter import ModelConverter
+from dbt_to_dataform.column_index import ColumnIndex
 from dbt_to_dataform.metadata_converter import MetadataConverter
+from dbt_to_dataform.assertion_converter import AssertionConverter
 from dbt_to_dataform.project_generator import ProjectGenerator
 from dbt_to_dataform.project_config_converter import ProjectConfigConverter
 from dbt_to_dataform.macro_converter import MacroConverter
+from dbt_to_dataform.package_cache import PackageCache
 from dbt_to_dataform.source_converter import SourceConverter
+from dbt_to_dataform.seed_converter import SeedConverter
+from dbt_to_dataform.snapshot_converter import SnapshotConverter
 from dbt_to_dataform.conversion_report import ConversionReport
 from dbt_to_dataform.syntax_checker import SyntaxChecker
+from dbt_to_dataform.isolated_executor import IsolatedExecutor, STATUS_OK, STATUS_TIMEOUT, STATUS_MEMORY, STATUS_CRASHED
+from dbt_to_dataform.llm_cache import LLMResponseCache
+from dbt_to_dataform.pipeline import Pipeline
+from dbt_to_dataform.conversion_planner import ConversionPlanner
+from dbt_to_dataform.checkpoint_journal import CheckpointJournal, content_fingerprint
+from dbt_to_dataform.ephemeral_inliner import EphemeralInliner
+from dbt_to_dataform.unit_converter import UnitConverter
 
-def main(dbt_repo_path: str, output_path: str, openai_api_key: str = None, verbose: bool = False):
+def main(dbt_repo_path: str, output_path: str, openai_api_key: str = None, verbose: bool = False,
+         workers: int = None, model_timeout: float = 120, model_memory_mb: int = 2048, render_jinja: bool = False,
+         executor: IsolatedExecutor = None, llm_cache: LLMResponseCache = None,
+         syntax_fragments: bool = False, queue_size: int = 16, check_workers: int = 4,
+         planner: ConversionPlanner = None, resume: bool = False,
+         ephemeral_max_consumers: int = None, ephemeral_max_lines: int = None) -> ConversionReport:
 
     # Initialize components
     analyzer = RepositoryAnalyzer(dbt_repo_path)
     project_generator = ProjectGenerator(output_path)
 
     print("Analyzing dbt repository...")
-    artifacts = analyzer.analyze()
     dbt_config = analyzer.get_project_config()
     conversion_report = ConversionReport(Path(output_path))
-    syntax_checker = SyntaxChecker(openai_api_key) if openai_api_key else None
+    # A plan must not mark anything as converted for a later --resume
+    journal = CheckpointJournal(Path(output_path), resume, enabled=planner is None)
+    syntax_checker = SyntaxChecker(openai_api_key, llm_cache, fragment_mode=syntax_fragments) if openai_api_key else None
 
     # Extract project variables
     project_variables = dbt_config.get('vars', {})
@@ -56,121 +77,483 @@ def main(dbt_repo_path: str, output_path: str, openai_api_key: str = None, verbo
     project_generator.generate_project_structure()
 
      
-    print("Converting sources...")
-    source_converter = SourceConverter(Path(dbt_repo_path), Path(output_path))
-    source_tables = source_converter.convert_sources()
+    # Units are only skipped on resume if the files they were converted from are unchanged
+    yaml_files = sorted(analyzer.iter_artifacts('yaml_files'))
+    yaml_fingerprint = content_fingerprint(*yaml_files)
+    if journal.is_done('sources', yaml_fingerprint):
+        source_tables = set(journal.result('sources'))
+    else:
+        print("Converting sources...")
+        source_converter = SourceConverter(Path(dbt_repo_path), Path(output_path))
+        source_tables = source_converter.convert_sources()
+        journal.record('sources', result=sorted(source_tables), fingerprint=yaml_fingerprint)
+
+    seeds = sorted(analyzer.iter_artifacts('seeds'))
+    seeds_fingerprint = content_fingerprint(*seeds)
+    if seeds and not journal.is_done('seeds', seeds_fingerprint):
+        print("Converting seeds...")
+        seed_converter = SeedConverter(analyzer.dbt_project_path, Path(output_path))
+        seeds_report = ConversionReport(Path(output_path))
+        seed_converter.convert_seeds(seeds, seeds_report)
+        _complete_unit('seeds', seeds_report, conversion_report, journal, seeds_fingerprint)
     
+    package_cache = PackageCache()
+    macro_thread = None
     if openai_api_key:
+        macro_converter = MacroConverter(openai_api_key, llm_cache)
+        packages_fingerprint = content_fingerprint(*(f"{name} {version}" for name, version, _
+                                                     in package_cache.find_packages(analyzer.dbt_project_path)))
+        if journal.is_done('packages', packages_fingerprint):
+            package_functions = journal.result('packages')
+        else:
+            print("Converting packages...")
+            package_functions = macro_converter.convert_packages(analyzer.dbt_project_path, output_path, package_cache)
+            journal.record('packages', result=package_functions, fingerprint=packages_fingerprint)
+        # Project macros only produce includes, so their OpenAI calls can overlap the model pipeline
         print("Converting macros...")
-        macro_converter = MacroConverter(openai_api_key)
-        macro_converter.convert_macros(dbt_repo_path, output_path)
+        macro_thread = threading.Thread(target=_convert_macros, daemon=True,
+                                        args=(macro_converter, analyzer.dbt_project_path, output_path,
+                                              conversion_report, journal))
+        macro_thread.start()
+    else:
+        package_functions = package_cache.install_cached_packages(analyzer.dbt_project_path, output_path)
+        if planner:
+            planner.plan_macros(MacroConverter(None, llm_cache), analyzer.dbt_project_path, package_cache)
 
-    print("Converting models...")
-    model_converter = ModelConverter(project_variables, dbt_models_dir, source_tables)
+    print("Converting models and metadata...")
+    column_index = ColumnIndex.build(analyzer.dbt_project_path)
+    model_converter = ModelConverter(project_variables, dbt_models_dir, source_tables, column_index)
+    model_converter.package_functions = package_functions
+    if render_jinja:
+        model_converter.enable_jinja_rendering(analyzer.dbt_project_path)
+    unit_converter = UnitConverter(model_converter, MetadataConverter(include_tests=False))
 
-    for model_path in artifacts['models']:
-        try:
-            sqlx_content, output_dir, output_file = model_converter.convert_model(model_path)
-            if sqlx_content is None or output_dir is None or output_file is None:
-                print(f"Skipping model due to conversion error: {model_path}")
-                continue
+    ephemeral_inliner = EphemeralInliner(Path(output_path), ephemeral_max_consumers, ephemeral_max_lines)
+    if not resume:
+        ephemeral_inliner.discard_originals()
+    executor = executor or IsolatedExecutor(max_workers=workers, timeout=model_timeout, memory_limit_mb=model_memory_mb)
 
-            output_model_path = Path(output_path) / 'definitions' / output_dir
-            output_model_path.mkdir(parents=True, exist_ok=True)
-            output_file_path = output_model_path / output_file
+    def unit_key(unit):
+        kind, path = unit
+        return f"{kind}:{path.relative_to(analyzer.dbt_project_path).as_posix()}"
 
-            
-            # Adjust source references
-            #sqlx_content = re.sub(r'\$\{ref\([\'"](\w+)[\'"]\)\}', lambda m: f"${{ref('source_{m.group(1)}')}}", sqlx_content)
+    def discover():
+        for model_path in analyzer.iter_artifacts('models'):
+            yield 'model', model_path
+        for yaml_path in analyzer.iter_artifacts('yaml_files'):
+            if yaml_path.name == 'schema.yml':
+                yield 'metadata', yaml_path
+
+    def check(converted):
+        unit, status, result = converted
+        # Issues are collected per file so they can be journaled with it
+        unit_report = ConversionReport(Path(output_path))
+        try:
+            output_file_path, content = _converted_output(unit, status, result, analyzer.dbt_project_path,
+                                                          dbt_models_dir, Path(output_path), unit_report)
+            if content is None:
+                # A crashed worker may be the run itself being killed, so retry it on resume
+                _complete_unit(unit_key(unit), unit_report, conversion_report,
+                               journal if status != STATUS_CRASHED else None, content_fingerprint(unit[1]))
+                return None
 
-            print(f"Converting model: {model_path.relative_to(dbt_models_dir)} to {output_file_path}")
+            # Ephemerals are mostly inlined into their consumers and removed, so they are
+            # only checked (or planned) if inlining keeps them as views
+            if ephemeral_inliner.is_ephemeral(content):
+                return unit, output_file_path, content, unit_report
 
             # Check and correct syntax if OpenAI API key is provided
             if syntax_checker:
                 print(f"Performing syntax check for {output_file_path}")
-                sqlx_content, corrections = syntax_checker.check_and_correct_syntax(output_file_path, sqlx_content, conversion_report)
+                content, corrections = syntax_checker.check_and_correct_syntax(output_file_path, content, unit_report)
                 if verbose and corrections:
                     print(f"Syntax corrections for {output_file_path}:")
                     print(corrections)
-            else:
-                print("Syntax checker not available. Skipping syntax check.")
+            elif planner:
+                planner.plan_syntax_check(output_file_path, content)
+            return unit, output_file_path, content, unit_report
+        except Exception as e:
+            _report_unit_error(unit, e, unit_report)
+            _complete_unit(unit_key(unit), unit_report, conversion_report, None)
 
-            if not isinstance(sqlx_content, str):
-                print(f"Warning: sqlx_content is not a string. Type: {type(sqlx_content)}")
-                sqlx_content = str(sqlx_content) if sqlx_content is not None else ""
+    def write(checked):
+        unit, output_file_path, content, unit_report = checked
+        try:
+            _write_output(unit, output_file_path, content, unit_report)
+            _complete_unit(unit_key(unit), unit_report, conversion_report, journal, content_fingerprint(unit[1]))
+        except Exception as e:
+            _report_unit_error(unit, e, unit_report)
+            _complete_unit(unit_key(unit), unit_report, conversion_report, None)
 
-            print(f"Writing content to {output_file_path}")
-            output_file_path.write_text(sqlx_content)
+    # Discovered files stream through conversion, syntax checking and writing,
+    # so I/O, model conversion and OpenAI waits overlap
+    pipeline = Pipeline(queue_size=queue_size)
+    pipeline.add_stream_stage('convert', lambda units: executor.imap_unordered(unit_converter, units))
+    pipeline.add_stage('check', check, workers=check_workers if syntax_checker else 1)
+    pipeline.add_stage('write', write)
+    pipeline.run(unit for unit in discover() if not journal.is_done(unit_key(unit), content_fingerprint(unit[1])))
+    for stage, error in pipeline.errors:
+        conversion_report.add_issue(str(output_path), "Pipeline Error", f"Error in the {stage} stage: {str(error)}")
 
-            # Check for potential issues
-            if "-- TODO:" in sqlx_content:
-                conversion_report.add_issue(
-                    str(model_path),
-                    "Incomplete Conversion",
-                    "This model contains TODO comments indicating manual review is needed."
-                )
-            if "dbt_utils" in sqlx_content:
-                conversion_report.add_issue(
-                    str(model_path),
-                    "Unconverted dbt_utils Reference",
-                    "This model still contains references to dbt_utils that couldn't be automatically converted."
+    snapshots = sorted(analyzer.iter_artifacts('snapshots'))
+    snapshots_fingerprint = content_fingerprint(*snapshots)
+    if snapshots and not journal.is_done('snapshots', snapshots_fingerprint):
+        print("Converting snapshots...")
+        snapshot_converter = SnapshotConverter(model_converter, Path(output_path))
+        snapshots_report = ConversionReport(Path(output_path))
+        snapshot_converter.convert_snapshots(snapshots, snapshots_report)
+        _complete_unit('snapshots', snapshots_report, conversion_report, journal, snapshots_fingerprint)
+
+    if not journal.is_done('tests', yaml_fingerprint):
+        print("Converting tests...")
+        assertion_converter = AssertionConverter(Path(output_path))
+        tests_report = ConversionReport(Path(output_path))
+        for yaml_path in yaml_files:
+            try:
+                assertion_converter.convert_schema_tests(yaml_path, tests_report)
+            except Exception as e:
+                print(f"Error converting tests in: {yaml_path}")
+                print(f"Error message: {str(e)}")
+                tests_report.add_issue(
+                    str(yaml_path),
+                    "Test Conversion Error",
+                    f"Error occurred during test conversion: {str(e)}"
                 )
-        except Exception as e:
-            print(f"Error converting model: {model_path.relative_to(dbt_models_dir)}")
-            print(f"Error message: {str(e)}")
-            print("Traceback:")
-            traceback.print_exc()
-            print("Skipping this model and continuing with the next...")
+        _complete_unit('tests', tests_report, conversion_report, journal, yaml_fingerprint)
+
+    # Inlining rewrites the outputs of every definition, so it is redone if any of them was
+    ephemerals_fingerprint = journal.completed_fingerprint(('model:', 'metadata:', 'snapshots', 'tests'))
+    if not journal.is_done('ephemerals', ephemerals_fingerprint):
+        ephemerals_report = ConversionReport(Path(output_path))
+        ephemeral_inliner.inline_ephemerals(ephemerals_report)
+        for view_path in ephemeral_inliner.materialized_files:
+            if syntax_checker:
+                content, _ = syntax_checker.check_and_correct_syntax(view_path, view_path.read_text(), ephemerals_report)
+                view_path.write_text(content)
+            elif planner:
+                planner.plan_syntax_check(view_path, view_path.read_text())
+        _complete_unit('ephemerals', ephemerals_report, conversion_report, journal, ephemerals_fingerprint)
+
+    if macro_thread:
+        macro_thread.join()
+        references_fingerprint = journal.completed_fingerprint(('macro:', 'ephemerals'))
+        if not journal.is_done('references', references_fingerprint):
+            print("Updating macro references...")
+            macro_converter.update_macro_references(output_path)
+            journal.record('references', fingerprint=references_fingerprint)
+
+    # Restore the issues of the units an earlier run completed
+    conversion_report.add_issues(journal.issues())
+
+    conversion_report.generate_report()
+
+    print("Conversion complete!")
+    return conversion_report
+
+
+def _convert_macros(macro_converter: MacroConverter, dbt_project_path: Path, output_path: str,
+                    conversion_report: ConversionReport, journal: CheckpointJournal):
+    try:
+        macro_converter.convert_macros(dbt_project_path, output_path, conversion_report, journal=journal)
+    except Exception as e:
+        print(f"Error converting macros: {str(e)}")
+        traceback.print_exc()
+        conversion_report.add_issue(str(dbt_project_path / 'macros'), "Macro Conversion Error",
+                                    f"Error occurred during macro conversion: {str(e)}")
+
+
+def _converted_output(unit, status, result, dbt_project_path: Path, dbt_models_dir: Path,
+                      output_path: Path, conversion_report: ConversionReport):
+    """Return (output file path, content) for a converted unit, or (None, None) if it failed."""
+    kind, path = unit
+    if kind == 'metadata':
+        relative_path = path.relative_to(dbt_project_path)
+        if status != STATUS_OK:
+            print(f"Error converting metadata: {relative_path}")
+            print(f"Error message: {result}")
+            print("Skipping this metadata file and continuing with the next...")
+            issue_type = {STATUS_TIMEOUT: "Conversion Timeout",
+                          STATUS_MEMORY: "Conversion Memory Limit"}.get(status, "Metadata Conversion Error")
             conversion_report.add_issue(
-                str(model_path),
-                "Conversion Error",
-                f"Error occurred during conversion: {str(e)}"
+                str(path),
+                issue_type,
+                f"Metadata conversion was aborted: {result}. The schema file needs manual conversion."
             )
+            return None, None
+        if not result:
+            print(f"Skipping empty or invalid schema file: {path}")
+            return None, None
+        print(f"Converting metadata: {relative_path}")
+        return output_path / 'definitions' / relative_path.with_suffix('.sqlx'), result
+
+    if status == STATUS_TIMEOUT:
+        print(f"Timed out converting model: {path.relative_to(dbt_models_dir)}")
+        conversion_report.add_issue(
+            str(path),
+            "Conversion Timeout",
+            f"Conversion was aborted: {result}. The model needs manual conversion."
+        )
+        return None, None
+    if status == STATUS_MEMORY:
+        print(f"Out of memory converting model: {path.relative_to(dbt_models_dir)}")
+        conversion_report.add_issue(
+            str(path),
+            "Conversion Memory Limit",
+            f"Conversion was aborted: {result}. The model needs manual conversion."
+        )
+        return None, None
+    if status != STATUS_OK:
+        print(f"Error converting model: {path.relative_to(dbt_models_dir)}")
+        print(f"Error message: {result}")
+        print("Skipping this model and continuing with the next...")
+        conversion_report.add_issue(
+            str(path),
+            "Conversion Error",
+            f"Error occurred during conversion: {result}"
+        )
+        return None, None
+
+    (sqlx_content, output_dir, output_file), model_issues = result
+    for issue in model_issues:
+        conversion_report.add_issue(str(path), issue['type'], issue['description'])
+    if sqlx_content is None or output_dir is None or output_file is None:
+        print(f"Skipping model due to conversion error: {path}")
+        return None, None
+
+    output_file_path = output_path / 'definitions' / output_dir / output_file
+    print(f"Converting model: {path.relative_to(dbt_models_dir)} to {output_file_path}")
+    return output_file_path, sqlx_content
+
 
-    print("Converting metadata...")
-    metadata_converter = MetadataConverter()
-    for yaml_path in artifacts['yaml_files']:
-        if yaml_path.name == 'schema.yml':
+def _complete_unit(unit: str, unit_report: ConversionReport, conversion_report: ConversionReport,
+                   journal: CheckpointJournal = None, fingerprint: str = None):
+    """Add a finished unit's issues to the report and, with a journal, record it as done."""
+    conversion_report.add_issues(unit_report.issues)
+    if journal:
+        journal.record(unit, unit_report.issues, fingerprint=fingerprint)
+
+
+def _report_unit_error(unit, error: Exception, conversion_report: ConversionReport):
+    kind, path = unit
+    print(f"Error converting {kind}: {path}")
+    print(f"Error message: {str(error)}")
+    print("Traceback:")
+    traceback.print_exc()
+    print("Skipping this file and continuing with the next...")
+    if kind == 'model':
+        conversion_report.add_issue(
+            str(path),
+            "Conversion Error",
+            f"Error occurred during conversion: {str(error)}"
+        )
+
+
+def _write_output(unit, output_file_path: Path, content, conversion_report: ConversionReport):
+    kind, path = unit
+    if not isinstance(content, str):
+        print(f"Warning: content is not a string. Type: {type(content)}")
+        content = str(content) if content is not None else ""
+
+    print(f"Writing content to {output_file_path}")
+    output_file_path.parent.mkdir(parents=True, exist_ok=True)
+    output_file_path.write_text(content)
+
+    if kind != 'model':
+        return
+    # Check for potential issues
+    if "-- TODO:" in content:
+        conversion_report.add_issue(
+            str(path),
+            "Incomplete Conversion",
+            "This model contains TODO comments indicating manual review is needed."
+        )
+    if "dbt_utils" in content:
+        conversion_report.add_issue(
+            str(path),
+            "Unconverted dbt_utils Reference",
+            "This model still contains references to dbt_utils that couldn't be automatically converted."
+        )
+
+def main_batch(repo_path: str, output_path: str, openai_api_key: str = None, verbose: bool = False,
+               workers: int = None, model_timeout: float = 120, model_memory_mb: int = 2048,
+               render_jinja: bool = False, merge: bool = False, max_projects: int = 4,
+               llm_cache: LLMResponseCache = None, syntax_fragments: bool = False,
+               queue_size: int = 16, check_workers: int = 4, planner: ConversionPlanner = None,
+               resume: bool = False, ephemeral_max_consumers: int = None, ephemeral_max_lines: int = None):
+    """Convert every dbt project in a monorepo concurrently.
+
+    Projects share one model worker pool and the YAML and LLM caches. Each
+    project gets its own report, plus a combined report in output_path. With
+    merge, all projects are combined into a single Dataform project.
+    """
+    projects = RepositoryAnalyzer.find_dbt_projects(repo_path)
+    if not projects:
+        raise FileNotFoundError("No dbt_project.yml found in the repository.")
+    print(f"Found {len(projects)} dbt projects")
+
+    output_root = Path(output_path)
+    project_names = _project_names(Path(repo_path), projects)
+    projects_root = output_root / '.projects' if merge else output_root / 'projects'
+    executor = IsolatedExecutor(max_workers=workers, timeout=model_timeout, memory_limit_mb=model_memory_mb)
+
+    reports = {}
+    with ThreadPoolExecutor(max_workers=max_projects) as pool:
+        futures = {
+            pool.submit(main, str(project), str(projects_root / name), openai_api_key, verbose,
+                        workers, model_timeout, model_memory_mb, render_jinja, executor, llm_cache,
+                        syntax_fragments, queue_size, check_workers, planner, resume,
+                        ephemeral_max_consumers, ephemeral_max_lines): name
+            for project, name in zip(projects, project_names)
+        }
+        for future, name in futures.items():
             try:
-                relative_path = yaml_path.relative_to(analyzer.dbt_project_path)
-                output_def_path = Path(output_path) / 'definitions' / relative_path.with_suffix('.sqlx')
-                output_def_path.parent.mkdir(parents=True, exist_ok=True)
-
-                print(f"Converting metadata: {relative_path}")
-                dataform_sqlx = metadata_converter.convert_schema_yml(yaml_path)
-                if dataform_sqlx:
-                    if syntax_checker:
-                        print(f"Performing syntax check for metadata: {output_def_path}")
-                        dataform_sqlx, corrections = syntax_checker.check_and_correct_syntax(output_def_path, dataform_sqlx, conversion_report)
-                        if verbose and corrections:
-                            print(f"Syntax corrections for {output_def_path}:")
-                            print(corrections)
-                    output_def_path.write_text(dataform_sqlx)
-                else:
-                    print(f"Skipping empty or invalid schema file: {yaml_path}")
+                reports[name] = future.result()
             except Exception as e:
-                print(f"Error converting metadata: {relative_path}")
-                print(f"Error message: {str(e)}")
-                print("Traceback:")
+                print(f"Error converting project {name}: {str(e)}")
                 traceback.print_exc()
-                print("Skipping this metadata file and continuing with the next...")
+                failed_report = ConversionReport(projects_root / name)
+                failed_report.add_issue(name, "Project Conversion Error", f"Error occurred during conversion: {str(e)}")
+                reports[name] = failed_report
 
-    if openai_api_key:
-        print("Updating macro references...")
-        macro_converter.update_macro_references(output_path)
+    combined_report = ConversionReport(output_root)
+    for name in project_names:
+        combined_report.add_report(name, reports[name])
 
-    conversion_report.generate_report()
+    if merge:
+        _merge_projects(projects_root, project_names, output_root, combined_report)
 
-    print("Conversion complete!")
+    output_root.mkdir(parents=True, exist_ok=True)
+    combined_report.generate_report()
+    print("Batch conversion complete!")
+    return combined_report
+
+
+def _project_names(repo_path: Path, projects: list) -> list:
+    names = []
+    for project in projects:
+        relative = project.relative_to(repo_path)
+        names.append('_'.join(relative.parts) if relative.parts else repo_path.resolve().name)
+    return names
+
+
+def _merge_projects(projects_root: Path, project_names: list, output_root: Path, combined_report: ConversionReport):
+    """Merge converted projects into one Dataform project under output_root.
+
+    Definitions go in definitions/<project>/, includes are shared, and the
+    dataform.json vars are combined. Conflicts are recorded in the report.
+    """
+    merged_config = None
+    action_owners = {}
+    reports_dir = output_root / 'reports'
+
+    for name in project_names:
+        project_output = projects_root / name
+        if not project_output.exists():
+            continue
+
+        definitions_dir = project_output / 'definitions'
+        if definitions_dir.exists():
+            target_dir = output_root / 'definitions' / name
+            shutil.copytree(definitions_dir, target_dir, dirs_exist_ok=True)
+            for sqlx_file in definitions_dir.rglob('*.sqlx'):
+                owner = action_owners.setdefault(sqlx_file.stem, name)
+                if owner != name:
+                    combined_report.add_issue(
+                        str(target_dir / sqlx_file.relative_to(definitions_dir)),
+                        "Duplicate Action Name",
+                        f"'{sqlx_file.stem}' is defined by both {owner} and {name}; rename one before compiling."
+                    )
+
+        includes_dir = project_output / 'includes'
+        if includes_dir.exists():
+            for include_file in includes_dir.glob('*.js'):
+                target = output_root / 'includes' / include_file.name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if target.exists() and target.read_text() != include_file.read_text():
+                    target = target.with_name(f"{name}_{include_file.name}")
+                    combined_report.add_issue(
+                        str(target),
+                        "Include Conflict",
+                        f"includes/{include_file.name} differs between projects; {name}'s copy was saved as {target.name}."
+                    )
+                shutil.copy(include_file, target)
+
+        config_path = project_output / 'dataform.json'
+        if config_path.exists():
+            with open(config_path, 'r') as f:
+                project_config = json.load(f)
+            if merged_config is None:
+                merged_config = project_config
+            else:
+                for var_name, value in project_config.get('vars', {}).items():
+                    existing = merged_config['vars'].setdefault(var_name, value)
+                    if existing != value:
+                        combined_report.add_issue(
+                            str(config_path),
+                            "Variable Conflict",
+                            f"The variable '{var_name}' differs between projects; the value from an earlier project was kept."
+                        )
+
+        for report_file in ('conversion_report.json', 'conversion_summary.txt'):
+            if (project_output / report_file).exists():
+                (reports_dir / name).mkdir(parents=True, exist_ok=True)
+                shutil.copy(project_output / report_file, reports_dir / name / report_file)
+
+    if merged_config is not None:
+        with open(output_root / 'dataform.json', 'w') as f:
+            json.dump(merged_config, f, indent=2)
+    ProjectGenerator(str(output_root))._create_package_json()
+    shutil.rmtree(projects_root, ignore_errors=True)
     
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convert dbt project to Dataform")
     parser.add_argument("dbt_repo_path", help="Path to the local dbt repository")
     parser.add_argument("output_path", help="Path to output the Dataform project")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--openai-api-key", help="OpenAI API key for complex conversions", default=None)
+    parser.add_argument("--workers", type=int, help="Number of worker processes used to convert models (default: CPU count)", default=None)
+    parser.add_argument("--model-timeout", type=float, help="Maximum seconds spent converting a single model", default=120)
+    parser.add_argument("--model-memory-mb", type=int, help="Maximum memory in MB a single model conversion may allocate", default=2048)
+    parser.add_argument("--queue-size", type=int, help="Maximum files waiting between conversion, syntax check and write stages", default=16)
+    parser.add_argument("--check-workers", type=int, help="Number of files syntax checked with OpenAI concurrently", default=4)
+    parser.add_argument("--render-jinja", action="store_true", help="Render models and project macros with a sandboxed Jinja environment")
+    parser.add_argument("--batch", action="store_true", help="Convert every dbt project found in the repository")
+    parser.add_argument("--merge", action="store_true", help="With --batch, merge all projects into a single Dataform project")
+    parser.add_argument("--max-projects", type=int, help="With --batch, number of projects converted concurrently", default=4)
+    parser.add_argument("--syntax-fragments", action="store_true", help="Only send suspicious fragments of each file to OpenAI for syntax correction")
+    parser.add_argument("--plan", action="store_true", help="Convert offline and estimate OpenAI tokens, cost and time without calling the API")
+    parser.add_argument("--rate-limit", type=float, help="With --plan, OpenAI requests allowed per minute", default=None)
+    parser.add_argument("--ephemeral-max-consumers", type=int, help="Materialize ephemeral models referenced by more models than this as views", default=None)
+    parser.add_argument("--ephemeral-max-lines", type=int, help="Materialize ephemeral models longer than this many lines as views", default=None)
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted conversion into the same output path")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Don't reuse or store OpenAI responses in the user cache")
 
     args = parser.parse_args()
 
-    main(args.dbt_repo_path, args.output_path, args.openai_api_key, args.verbose)
+    llm_cache = None if args.no_llm_cache else LLMResponseCache()
+
+    planner = None
+    openai_api_key = args.openai_api_key
+    if args.plan:
+        # Plan mode never calls the API, even when a key is given
+        planner = ConversionPlanner(llm_cache, args.check_workers, args.rate_limit, args.syntax_fragments)
+        openai_api_key = None
+
+    if args.batch:
+        main_batch(args.dbt_repo_path, args.output_path, openai_api_key, args.verbose,
+                   args.workers, args.model_timeout, args.model_memory_mb, args.render_jinja,
+                   args.merge, args.max_projects, llm_cache, args.syntax_fragments,
+                   args.queue_size, args.check_workers, planner, args.resume,
+                   args.ephemeral_max_consumers, args.ephemeral_max_lines)
+    else:
+        main(args.dbt_repo_path, args.output_path, openai_api_key, args.verbose,
+             args.workers, args.model_timeout, args.model_memory_mb, args.render_jinja,
+             llm_cache=llm_cache, syntax_fragments=args.syntax_fragments,
+             queue_size=args.queue_size, check_workers=args.check_workers, planner=planner,
+             resume=args.resume, ephemeral_max_consumers=args.ephemeral_max_consumers,
+             ephemeral_max_lines=args.ephemeral_max_lines)
+
+    if planner:
+        planner.generate_report(Path(args.output_path))
 